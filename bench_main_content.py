@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Measure how much main_content.main_text shrinks the page text that
+parse_with_ai sends to the LLM.
+
+By default runs over the checked-in scraped_*.json samples (YouTube
+transcripts are skipped; scrape_url never trims them). Those samples hold
+text only, so each line is a block with no link information. HTML files can
+be passed as well, in which case the blocks come from page_extract with
+real link density, as in scrape_url.
+
+Tokens are estimated at 4 characters each; the fixed instructions in the
+prompt are the same either way and are left out. "kept" says whether the
+ingredients and method headings found in the full text survived the cut.
+
+    python bench_main_content.py [pages.html ...]
+"""
+
+import argparse
+import glob
+import json
+import re
+
+import main_content
+import page_extract
+
+
+MAX_CONTENT_CHARS = 15000  # scrape_url's cap on the content it passes on
+CHARS_PER_TOKEN = 4
+
+_INGREDIENTS_RE = re.compile(r'\bingredients?\b', re.IGNORECASE)
+_METHOD_RE = re.compile(r'\b(?:method|instructions?|directions?)\b', re.IGNORECASE)
+
+
+def samples(patterns):
+    for path in sorted(glob.glob('scraped_*.json')):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('type'):
+            continue
+        yield path, main_content.blocks_from_text(data.get('content', '')), data.get('structured_data')
+    for path in sorted({p for pattern in patterns for p in glob.glob(pattern)}):
+        with open(path, 'rb') as f:
+            page = page_extract.extract_page(f.read())
+        yield path, page['blocks'], page['recipe']
+
+
+def prompt_tokens(text, structured):
+    payload = text[:MAX_CONTENT_CHARS]
+    if structured:
+        payload += json.dumps(structured, indent=2)
+    return len(payload) // CHARS_PER_TOKEN
+
+
+def kept(full, main):
+    return all(bool(pattern.search(main)) or not pattern.search(full) for pattern in (_INGREDIENTS_RE, _METHOD_RE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='HTML files or globs, in addition to the scraped_*.json samples')
+    args = parser.parse_args()
+
+    print(f"{'page':<48} {'blocks':>6} {'before':>7} {'after':>7} {'saved':>6} {'kept':>5}")
+    total_before = total_after = 0
+    for path, blocks, structured in samples(args.pages):
+        full = '\n'.join(text for text, _ in blocks)
+        trimmed = main_content.main_text(blocks)
+        before, after = prompt_tokens(full, structured), prompt_tokens(trimmed, structured)
+        total_before += before
+        total_after += after
+        saved = 1 - after / before if before else 0
+        print(f"{path[-48:]:<48} {len(blocks):>6} {before:>7} {after:>7} {saved:>6.0%} {'yes' if kept(full, trimmed) else 'NO':>5}")
+
+    if total_before:
+        print(f"{'total':<48} {'':>6} {total_before:>7} {total_after:>7} {1 - total_after / total_before:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Compare the lxml single-pass extractor (page_extract.extract_page) with the
+BeautifulSoup/html.parser path scrape_url used before it, over saved pages.
+
+By default it runs over fixtures/structured_data/*.html, the checked-in
+scraped_*.json samples (rebuilt as pages: title, their JSON-LD and the
+text, one paragraph per line; YouTube transcripts are skipped) and any
+bodies in the scraper's page cache (PAGE_CACHE_DIR, instance/page_cache),
+so scraping a few recipes first makes the corpus more realistic. Any HTML
+files can be passed instead. For each path it reports the
+mean parse time per page, peak RSS growth while parsing the whole corpus
+(measured in a forked child, so libxml2's own allocations are counted),
+and how many pages yielded a schema.org Recipe.
+
+    python bench_page_extract.py [pages ...] [--repeat 20]
+"""
+
+import argparse
+import glob
+import html
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+from bs4 import BeautifulSoup
+
+import page_extract
+
+
+def soup_path(content):
+    """The pre-lxml scrape_url parsing: scripts were stripped before ld+json was looked for."""
+    soup = BeautifulSoup(content, 'html.parser')
+    for element in soup(["script", "style", "nav", "header", "footer"]):
+        element.decompose()
+    recipe = None
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string)
+            if isinstance(data, list):
+                data = data[0]
+            if 'Recipe' in str(data.get('@type', '')):
+                recipe = data
+                break
+        except Exception:
+            continue
+    title = soup.find('title')
+    title = title.get_text().strip() if title else ""
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    return recipe, '\n'.join(line for line in lines if line)
+
+
+def lxml_path(content):
+    page = page_extract.extract_page(content)
+    return page['recipe'], page['text']
+
+
+PATHS = {'bs4 html.parser': soup_path, 'lxml single pass': lxml_path}
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def page_from_sample(data):
+    """An HTML page standing in for a scraped_*.json sample, which kept only the page's text."""
+    ld_json = ''
+    if data.get('structured_data'):
+        ld_json = f'<script type="application/ld+json">{json.dumps(data["structured_data"])}</script>'
+    paragraphs = ''.join(f'<p>{html.escape(line)}</p>' for line in data.get('content', '').splitlines() if line.strip())
+    return (f'<html><head><title>{html.escape(data.get("title", ""))}</title>{ld_json}</head>'
+            f'<body>{paragraphs}</body></html>').encode('utf-8')
+
+
+def default_docs():
+    """(name, body) for the fixtures, the scraped_*.json samples and the page cache bodies."""
+    docs = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'fixtures', 'structured_data', '*.html'))):
+        with open(path, 'rb') as f:
+            docs.append((path, f.read()))
+    for path in sorted(glob.glob(os.path.join(ROOT, 'scraped_*.json'))):
+        with open(path) as f:
+            data = json.load(f)
+        if not data.get('type'):
+            docs.append((path, page_from_sample(data)))
+    cache = os.getenv('PAGE_CACHE_DIR', os.path.join('instance', 'page_cache'))
+    for path in sorted(glob.glob(os.path.join(cache, '*', '*'))):
+        if not path.endswith('.json') and '.tmp-' not in path:
+            with open(path, 'rb') as f:
+                docs.append((path, f.read()))
+    return docs
+
+
+def peak_rss_kb(name, docs, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for doc in docs:
+        PATHS[name](doc)
+    queue.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='HTML files or globs (default: fixtures, samples and page cache bodies)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.pages:
+        paths = sorted({p for pattern in args.pages for p in glob.glob(pattern)})
+        docs = [open(p, 'rb').read() for p in paths]
+    else:
+        docs = [body for _, body in default_docs()]
+    if not docs:
+        raise SystemExit("No pages found")
+
+    total_bytes = sum(len(doc) for doc in docs)
+    print(f"{len(docs)} pages, {total_bytes} bytes, mean {total_bytes // len(docs)} bytes")
+    print(f"{'path':<18} {'ms/page':>9} {'peak RSS +KB':>13} {'recipes':>8} {'text chars':>11}")
+
+    # Memory first, each path in its own child forked from a parent that has
+    # not parsed anything yet, so neither inherits the other's heap
+    ctx = multiprocessing.get_context('fork')
+    rss_kb = {}
+    for name in PATHS:
+        queue = ctx.Queue()
+        child = ctx.Process(target=peak_rss_kb, args=(name, docs, queue))
+        child.start()
+        rss_kb[name] = queue.get()
+        child.join()
+
+    for name, fn in PATHS.items():
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            results = [fn(doc) for doc in docs]
+        per_page = (time.perf_counter() - started) / args.repeat / len(docs)
+        rss = rss_kb[name]
+
+        found = sum(1 for recipe, _ in results if recipe)
+        chars = sum(len(text) for _, text in results)
+        print(f"{name:<18} {per_page * 1000:>9.2f} {rss:>13} {found:>8} {chars:>11}")
+
+
+if __name__ == '__main__':
+    main()
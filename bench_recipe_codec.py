@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare stored size and encode/decode cost of the recipe storage codecs
+over the checked-in recipe_*.md corpus.
+
+The dictionary row is scored leave-one-out: each recipe is compressed with a
+dictionary trained on the *other* recipes, so it is not flattered by having
+seen the document it compresses.
+
+    python bench_recipe_codec.py [--repeat 200]
+"""
+
+import argparse
+import glob
+import gzip
+import time
+
+import zstandard
+
+from recipe_codec import RecipeCodec
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--dict-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob('recipe_*.md'))
+    docs = [open(p, 'rb').read() for p in paths]
+    if len(docs) < 3:
+        raise SystemExit("Need at least 3 recipe_*.md files to benchmark")
+
+    plain_zstd = zstandard.ZstdCompressor(level=19)
+    plain_zstd_d = zstandard.ZstdDecompressor()
+
+    def leave_one_out(i):
+        dictionary = zstandard.train_dictionary(args.dict_size, docs[:i] + docs[i + 1:])
+        return (zstandard.ZstdCompressor(level=19, dict_data=dictionary),
+                zstandard.ZstdDecompressor(dict_data=dictionary))
+
+    rows = {name: [0, 0.0, 0.0] for name in ('plain', 'gzip-9', 'zstd-19', 'zstd-19+dict', 'zstd-19+dict (shipped)')}
+    shipped = RecipeCodec('zstd')
+
+    for i, doc in enumerate(docs):
+        text = doc.decode('utf-8')
+        rows['plain'][0] += len(doc)
+
+        body, enc = timed(lambda: gzip.compress(doc, 9, mtime=0), args.repeat)
+        _, dec = timed(lambda: gzip.decompress(body), args.repeat)
+        rows['gzip-9'][0] += len(body); rows['gzip-9'][1] += enc; rows['gzip-9'][2] += dec
+
+        body, enc = timed(lambda: plain_zstd.compress(doc), args.repeat)
+        _, dec = timed(lambda: plain_zstd_d.decompress(body), args.repeat)
+        rows['zstd-19'][0] += len(body); rows['zstd-19'][1] += enc; rows['zstd-19'][2] += dec
+
+        cctx, dctx = leave_one_out(i)
+        body, enc = timed(lambda: cctx.compress(doc), args.repeat)
+        _, dec = timed(lambda: dctx.decompress(body), args.repeat)
+        rows['zstd-19+dict'][0] += len(body); rows['zstd-19+dict'][1] += enc; rows['zstd-19+dict'][2] += dec
+
+        (body, meta), enc = timed(lambda: shipped.encode(text), args.repeat)
+        _, dec = timed(lambda: shipped.decode(body, meta), args.repeat)
+        row = rows['zstd-19+dict (shipped)']
+        row[0] += len(body); row[1] += enc; row[2] += dec
+
+    total_plain = rows['plain'][0]
+    print(f"{len(docs)} recipes, {total_plain} bytes plain, mean {total_plain // len(docs)} bytes")
+    print(f"{'codec':<24} {'bytes':>8} {'ratio':>7} {'encode us':>10} {'decode us':>10}")
+    for name, (size, enc, dec) in rows.items():
+        print(f"{name:<24} {size:>8} {total_plain / size:>7.2f} "
+              f"{enc * 1e6 / len(docs):>10.1f} {dec * 1e6 / len(docs):>10.1f}")
+    print("(shipped dictionary was trained on this same corpus, so its ratio is optimistic)")
+
+
+if __name__ == '__main__':
+    main()
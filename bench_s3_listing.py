@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark S3Storage.list_recipes latency against recipe count and HEAD concurrency.
+
+Runs against a local moto S3 server (or any S3-compatible endpoint given with
+--endpoint-url) and injects a fixed per-request delay to stand in for the
+network round trip to real S3.
+
+    python bench_s3_listing.py --counts 100 500 1000 --concurrency 1 4 10 --latency-ms 20
+"""
+
+import argparse
+import os
+import time
+
+BUCKET = 'recipe-bench-bucket'
+
+
+def configure_env(endpoint_url):
+    # recipe_scraper_s3 builds its app and storage at import time from the environment
+    os.environ['AWS_S3_BUCKET'] = BUCKET
+    os.environ['AWS_S3_ENDPOINT_URL'] = endpoint_url
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+    os.environ.setdefault('AWS_REGION', 'us-east-1')
+    os.environ.setdefault('GROQ_API_KEY', 'bench')
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+
+def seed(s3_client, user_id, count):
+    for i in range(count):
+        s3_client.put_object(
+            Bucket=BUCKET,
+            Key=f"recipes/{user_id}/recipe_bench_{i:06d}.md",
+            Body=f"# Bench Recipe {i}\n\n**Ingredients:**\n• 100g flour\n".encode('utf-8'),
+            ContentType='text/markdown',
+            Metadata={'created': f"2025-01-01T00:00:{i % 60:02d}", 'type': 'recipe', 'recipe-name': f"Bench Recipe {i}"},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', help='S3-compatible endpoint; defaults to a local moto server')
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 10])
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Simulated per-request round trip')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if not endpoint_url:
+        from moto.server import ThreadedMotoServer
+        server = ThreadedMotoServer(ip_address='127.0.0.1', port=5055, verbose=False)
+        server.start()
+        endpoint_url = 'http://127.0.0.1:5055'
+
+    configure_env(endpoint_url)
+
+    import boto3
+    admin_client = boto3.client('s3', endpoint_url=endpoint_url, region_name=os.environ['AWS_REGION'])
+    admin_client.create_bucket(Bucket=BUCKET)
+
+    from recipe_scraper_s3 import storage
+
+    def simulated_round_trip(**kwargs):
+        time.sleep(args.latency_ms / 1000.0)
+
+    storage.s3_client.meta.events.register('before-call.s3', simulated_round_trip)
+    max_pool = storage.s3_client.meta.config.max_pool_connections
+
+    print(f"endpoint={endpoint_url} latency={args.latency_ms}ms max_pool_connections={max_pool}")
+    print(f"{'recipes':>8} {'concurrency':>12} {'best (s)':>10} {'per key (ms)':>13}")
+
+    try:
+        for user_id, count in enumerate(args.counts, start=1):
+            seed(admin_client, user_id, count)
+            for concurrency in args.concurrency:
+                storage.listing_concurrency = max(1, min(concurrency, max_pool))
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    listed = storage.list_recipes(user_id)
+                    timings.append(time.perf_counter() - started)
+                assert len(listed) == count, f"expected {count} recipes, listed {len(listed)}"
+                best = min(timings)
+                print(f"{count:>8} {storage.listing_concurrency:>12} {best:>10.3f} {best * 1000 / count:>13.2f}")
+    finally:
+        if server:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
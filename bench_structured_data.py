@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Measure how often a schema.org Recipe is found in saved pages, by the
+structured_data layer page_extract now uses and by the json.loads-only
+reader it replaced (first element of a list, top-level @type only, every
+error swallowed). The old reader is run before scripts are stripped,
+which flatters it: scrape_url used to strip them first and found nothing.
+
+Pages default to fixtures/structured_data, one file per case the layer is
+meant to handle. A page whose name starts with no_recipe should yield
+nothing. Other HTML files, such as page cache bodies, can be passed instead.
+"complete" means recipe_render can render the Recipe without the LLM.
+
+Also times decoding every ld+json block with orjson (when installed)
+against the standard library.
+
+    python bench_structured_data.py [pages ...] [--repeat 2000]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import lxml.html
+
+import recipe_render
+import structured_data
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'structured_data')
+
+
+def legacy_recipe(tree):
+    """The old extract_structured_data, on lxml instead of BeautifulSoup."""
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text)
+            if isinstance(data, list):
+                data = data[0]
+            if data.get('@type') == 'Recipe' or 'Recipe' in str(data.get('@type', '')):
+                return data
+        except Exception:
+            continue
+    return None
+
+
+def new_recipe(tree):
+    sources = {
+        'json-ld': structured_data.json_ld_blocks(tree),
+        'microdata': structured_data.microdata(tree),
+        'rdfa': structured_data.rdfa(tree),
+    }
+    recipe = structured_data.best_recipe(*sources.values())
+    source = next((name for name, blocks in sources.items() if any(r is recipe for r in structured_data.iter_recipes(blocks))), '')
+    return recipe, source
+
+
+def raw_blocks(trees):
+    return [
+        (script.text or '').strip()
+        for tree in trees for script in tree.xpath('//script[@type="application/ld+json"]')
+        if (script.text or '').strip()
+    ]
+
+
+def time_decoder(name, decode, raws, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for raw in raws:
+            try:
+                decode(raw)
+            except ValueError:
+                pass
+    per_block = (time.perf_counter() - started) / repeat / len(raws)
+    print(f"{name:<28} {per_block * 1e6:>8.2f} us/block")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help=f'HTML files or globs (default: {FIXTURES})')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    patterns = args.pages or [os.path.join(FIXTURES, '*.html')]
+    paths = sorted({p for pattern in patterns for p in glob.glob(pattern)})
+    if not paths:
+        raise SystemExit("No pages found")
+
+    trees = []
+    counts = {'old found': 0, 'new found': 0, 'new complete': 0, 'expected': 0}
+    print(f"{'page':<40} {'old':>5} {'new':>5} {'complete':>9} {'source':>10}")
+    for path in paths:
+        with open(path, 'rb') as f:
+            tree = lxml.html.document_fromstring(f.read())
+        trees.append(tree)
+        name = os.path.basename(path)
+        old = legacy_recipe(tree) is not None
+        recipe, source = new_recipe(tree)
+        complete = recipe_render.is_complete(recipe)
+        counts['old found'] += old
+        counts['new found'] += recipe is not None
+        counts['new complete'] += complete
+        counts['expected'] += not name.startswith('no_recipe')
+        print(f"{name[-40:]:<40} {'yes' if old else '-':>5} {'yes' if recipe else '-':>5} "
+              f"{'yes' if complete else '-':>9} {source or '-':>10}")
+
+    print(f"\n{len(paths)} pages, {counts['expected']} with a recipe: old reader found {counts['old found']}, "
+          f"new layer found {counts['new found']} ({counts['new complete']} complete)\n")
+
+    raws = raw_blocks(trees)
+    if raws:
+        stdlib = json.JSONDecoder(strict=False)
+        time_decoder('json (strict=False)', stdlib.decode, raws, args.repeat)
+        if structured_data.orjson is not None:
+            time_decoder('orjson', structured_data.orjson.loads, raws, args.repeat)
+        else:
+            print("orjson not installed")
+        time_decoder('structured_data.loads', structured_data.loads, raws, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
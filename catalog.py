@@ -0,0 +1,262 @@
+"""
+SQL recipe catalog.
+
+The Recipe table mirrors every markdown object stored under
+recipes/{user_id}/ so listings are served from one indexed query
+instead of a HEAD request per S3 object. RecipeCounter keeps per-user,
+per-source totals next to it; every insert/delete here adjusts the
+counters before the same commit, so counts are O(users + sources)
+rather than O(recipes).
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Recipe, RecipeCounter
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def recipe_key(user_id, filename):
+    return f"recipes/{user_id}/{filename}"
+
+
+def source_from_url(url):
+    """Return the bare domain a recipe was scraped from, or None for manual/photo recipes."""
+    if not url or not url.startswith(('http://', 'https://')):
+        return None
+    return urlparse(url).netloc.replace('www.', '') or None
+
+
+def _bump_counter(user_id, source, delta):
+    """
+    Add `delta` to the (user, source) counter inside the current transaction.
+    The increment is done in SQL (count = count + delta) so two workers
+    saving for the same user don't lose an update, and the first row for a
+    (user, source) is an upsert so two workers creating it at once don't
+    collide on the primary key.
+    """
+    if not delta:
+        return
+    user_id = int(user_id)
+    source = source or ''
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(RecipeCounter).values(user_id=user_id, source=source, count=max(delta, 0))
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[RecipeCounter.user_id, RecipeCounter.source],
+            set_={'count': RecipeCounter.count + delta}))
+        return
+    updated = RecipeCounter.query.filter_by(user_id=user_id, source=source).update(
+        {RecipeCounter.count: RecipeCounter.count + delta}, synchronize_session=False)
+    if not updated:
+        db.session.add(RecipeCounter(user_id=user_id, source=source, count=max(delta, 0)))
+        db.session.flush()
+
+
+def record_recipe(user_id, filename, title, source=None, created_at=None, photo_key=None):
+    """Insert or update the catalog row for a recipe that was just written to storage."""
+    key = recipe_key(user_id, filename)
+    recipe = Recipe.query.filter_by(s3_key=key).first()
+    is_new = recipe is None
+    if is_new:
+        recipe = Recipe(s3_key=key, user_id=user_id, created_at=created_at or datetime.utcnow())
+        db.session.add(recipe)
+    previous_source = recipe.source
+    recipe.title = (title or 'Unknown Recipe')[:150]
+    if source is not None:
+        recipe.source = source
+    if photo_key is not None:
+        recipe.photo_key = photo_key
+    # Counter changes ride in the same transaction as the row itself
+    if is_new:
+        _bump_counter(user_id, recipe.source, 1)
+    elif recipe.source != previous_source:
+        _bump_counter(user_id, previous_source, -1)
+        _bump_counter(user_id, recipe.source, 1)
+    db.session.commit()
+    return recipe
+
+
+def _forget_keys(user_id, keys):
+    """Delete catalog rows by key and take them off the counters. Caller commits."""
+    by_source = (db.session.query(Recipe.source, db.func.count(Recipe.id))
+                 .filter(Recipe.s3_key.in_(keys)).group_by(Recipe.source).all())
+    if not by_source:
+        return 0
+    deleted = Recipe.query.filter(Recipe.s3_key.in_(keys)).delete(synchronize_session=False)
+    for source, count in by_source:
+        _bump_counter(user_id, source, -count)
+    return deleted
+
+
+def owned_filenames(user_id, filenames):
+    """The subset of `filenames` that have a catalog row for `user_id`."""
+    keys = [recipe_key(user_id, filename) for filename in filenames]
+    if not keys:
+        return set()
+    rows = db.session.query(Recipe.s3_key).filter(Recipe.user_id == user_id, Recipe.s3_key.in_(keys)).all()
+    return {key.rsplit('/', 1)[-1] for key, in rows}
+
+
+def forget_recipe(user_id, filename):
+    """Remove the catalog row for a deleted recipe. Returns True if a row existed."""
+    deleted = _forget_keys(user_id, [recipe_key(user_id, filename)])
+    db.session.commit()
+    return deleted > 0
+
+
+def forget_recipes(user_id, filenames):
+    """Remove catalog rows for many deleted recipes in one transaction. Returns the row count."""
+    if not filenames:
+        return 0
+    deleted = _forget_keys(user_id, [recipe_key(user_id, filename) for filename in filenames])
+    db.session.commit()
+    return deleted
+
+
+def serialize_recipe(recipe, include_user=False):
+    item = {
+        'filename': recipe.s3_key.rsplit('/', 1)[-1],
+        'name': recipe.title,
+        'source': recipe.source,
+        'photo_key': recipe.photo_key,
+        'created': recipe.created_at.isoformat() if recipe.created_at else None,
+    }
+    if include_user:
+        item['user_id'] = str(recipe.user_id)
+    return item
+
+
+def encode_cursor(recipe):
+    """Opaque keyset cursor pointing just past `recipe` in newest-first order."""
+    raw = json.dumps([recipe.created_at.isoformat(), recipe.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for anything malformed."""
+    try:
+        created, recipe_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created), int(recipe_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _page(query, limit, cursor, include_user=False):
+    """
+    Keyset pagination over (created_at, id) descending.
+    Fetches one extra row to know whether another page exists.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    if cursor:
+        created_at, recipe_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            Recipe.created_at < created_at,
+            db.and_(Recipe.created_at == created_at, Recipe.id < recipe_id),
+        ))
+    rows = query.order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [serialize_recipe(r, include_user) for r in rows[:limit]], next_cursor
+
+
+def list_user_recipes(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Return (recipes, next_cursor) for one page of a user's recipes."""
+    return _page(Recipe.query.filter_by(user_id=user_id), limit, cursor)
+
+
+def list_all_recipes(limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """Admin view: (recipes, next_cursor) for one page across every user."""
+    return _page(Recipe.query, limit, cursor, include_user=True)
+
+
+def count_recipes(user_id=None):
+    """Total recipes, for one user or overall, read from the counters."""
+    query = db.session.query(db.func.coalesce(db.func.sum(RecipeCounter.count), 0))
+    if user_id is not None:
+        query = query.filter(RecipeCounter.user_id == user_id)
+    return int(query.scalar())
+
+
+def user_recipe_counts():
+    """Return {user_id (str): recipe count} from the counters."""
+    rows = (db.session.query(RecipeCounter.user_id, db.func.sum(RecipeCounter.count))
+            .group_by(RecipeCounter.user_id).all())
+    return {str(user_id): int(count) for user_id, count in rows}
+
+
+def source_counts(user_id=None):
+    """Return {source: recipe count}, largest first. Manual/photo recipes are under None."""
+    query = db.session.query(RecipeCounter.source, db.func.sum(RecipeCounter.count))
+    if user_id is not None:
+        query = query.filter(RecipeCounter.user_id == user_id)
+    rows = query.group_by(RecipeCounter.source).order_by(db.func.sum(RecipeCounter.count).desc()).all()
+    return {(source or None): int(count) for source, count in rows if count}
+
+
+def reconcile_counters():
+    """
+    Rebuild RecipeCounter from the Recipe table in one transaction.
+    Returns the number of (user, source) counters that had drifted.
+    """
+    rows = (db.session.query(Recipe.user_id, Recipe.source, db.func.count(Recipe.id))
+            .group_by(Recipe.user_id, Recipe.source).all())
+    # Recipe.source NULL and '' both map to the '' counter
+    merged = {}
+    for user_id, source, count in rows:
+        key = (user_id, source or '')
+        merged[key] = merged.get(key, 0) + count
+    stored = {(c.user_id, c.source): c.count for c in RecipeCounter.query.all()}
+    drifted = sum(1 for key in set(merged) | set(stored) if merged.get(key, 0) != stored.get(key, 0))
+    RecipeCounter.query.delete(synchronize_session=False)
+    for (user_id, source), count in merged.items():
+        db.session.add(RecipeCounter(user_id=user_id, source=source, count=count))
+    db.session.commit()
+    return drifted
+
+
+def sync_from_storage(storage, prune=False):
+    """
+    Backfill the catalog from what is actually in storage.
+    Adds rows for objects the table doesn't know about; with prune=True also
+    drops rows whose object is gone.
+    """
+    stored, _ = storage.list_all_recipes_admin()
+    seen = set()
+    added = 0
+    for item in stored:
+        if not item['user_id'].isdigit():
+            continue
+        key = recipe_key(item['user_id'], item['filename'])
+        seen.add(key)
+        if Recipe.query.filter_by(s3_key=key).first() is None:
+            try:
+                created_at = datetime.fromisoformat(item['created'])
+                if created_at.tzinfo is not None:
+                    created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+            except (TypeError, ValueError):
+                created_at = None
+            db.session.add(Recipe(
+                s3_key=key,
+                user_id=int(item['user_id']),
+                title=(item['name'] or 'Unknown Recipe')[:150],
+                created_at=created_at or datetime.utcnow(),
+            ))
+            _bump_counter(item['user_id'], None, 1)
+            added += 1
+    removed = 0
+    if prune:
+        for recipe in Recipe.query.all():
+            if recipe.s3_key not in seen:
+                db.session.delete(recipe)
+                _bump_counter(recipe.user_id, recipe.source, -1)
+                removed += 1
+    db.session.commit()
+    return added, removed
@@ -0,0 +1,77 @@
+"""
+In-process LRU cache for recipe markdown, bounded by total bytes.
+
+Entries keep the S3 ETag they were read with so callers can revalidate
+with IfNoneMatch and only pay for a 304 when the object hasn't changed.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ContentCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (content, etag, last_modified, size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """Return (content, etag, last_modified) for a cached key, or None. Marks the entry as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[:3]
+
+    def put(self, key, content, etag, last_modified=None):
+        if not self.enabled or not etag:
+            return
+        size = len(content.encode('utf-8'))
+        if size > self.max_bytes:
+            # Never let one oversized object flush the whole cache
+            self.invalidate(key)
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[3]
+            self._entries[key] = (content, etag, last_modified, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[3]
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import re
 from datetime import datetime
@@ -10,6 +9,12 @@ from urllib.parse import urlparse
 import sys
 import openai
 import yt_dlp
+from page_cache import EARLY_STOPS, PageCache
+import main_content
+import page_extract
+import recipe_render
+import site_adapters
+import wprm
 
 class RecipeScraper:
     def __init__(self):
@@ -25,6 +30,7 @@ class RecipeScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.page_cache = PageCache()
     
     def is_youtube_url(self, url):
         youtube_patterns = [
@@ -179,28 +185,37 @@ class RecipeScraper:
         
         try:
             print(f"📄 Fetching webpage: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            # Served from the on-disk page cache when fresh or still valid (304)
+            response = self.page_cache.fetch(self.session, url, timeout=10)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove only the most disruptive elements, keep more content
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-            
-            # Extract structured recipe data (JSON-LD)
-            structured_recipe = self.extract_structured_data(soup)
-            
-            # Get page title
-            title = soup.find('title')
-            page_title = title.get_text().strip() if title else ""
-            
-            # Get ALL text content - let AI filter what's important
-            text_content = soup.get_text()
+            # Stopped at a WordPress Recipe Maker id: fetch the recipe as JSON,
+            # or the rest of the page when the site does not serve it
+            if response.stopped == 'wprm':
+                wprm_recipe = wprm.fetch_recipe(self.session, response.url, wprm.find_recipe_id(response.content))
+                if wprm_recipe:
+                    print("✅ WPRM recipe fetched as JSON")
+                    return {
+                        "url": url,
+                        "title": wprm_recipe['name'],
+                        "content": recipe_render.render_markdown(wprm_recipe),
+                        "structured_data": wprm_recipe,
+                        "recipe_sections": {},
+                        "scraped_at": datetime.now().isoformat()
+                    }
+                response = self.page_cache.fetch(self.session, url, timeout=10, early_stop=False)
             
-            # Clean up text content but keep more of it
-            lines = (line.strip() for line in text_content.splitlines())
-            text_content = '\n'.join(line for line in lines if line)
+            # One lxml pass: structured data (JSON-LD, @graph, microdata) is read
+            # before any <script> is dropped, then the visible text
+            page = page_extract.extract_page(response.content)
+            # Known sites are read straight from their recipe markup, when the page
+            # is whole and its own structured data doesn't already hold the recipe
+            adapted_recipe = None
+            if response.stopped not in EARLY_STOPS and not recipe_render.is_complete(page['recipe']):
+                _, adapted_recipe = site_adapters.extract(url, page['tree'])
+            structured_recipe = adapted_recipe or page['recipe']
+            page_title = page['title']
+            # Only the recipe-bearing region, not the story, comments and teasers
+            text_content = main_content.main_text(page['blocks'])
             
             # Extract recipe sections for better parsing
             recipe_sections = self.extract_recipe_sections(text_content)
@@ -222,20 +237,6 @@ class RecipeScraper:
             print(f"❌ Error scraping URL: {str(e)}")
             return None
     
-    def extract_structured_data(self, soup):
-        """Extract JSON-LD structured data for recipes"""
-        scripts = soup.find_all('script', type='application/ld+json')
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, list):
-                    data = data[0]
-                if data.get('@type') == 'Recipe' or 'Recipe' in str(data.get('@type', '')):
-                    return data
-            except:
-                continue
-        return None
-    
     def save_scraped_data(self, data, filename=None):
         """Save scraped data to JSON file"""
         if not filename:
@@ -251,6 +252,11 @@ class RecipeScraper:
     
     def parse_with_ai(self, scraped_data):
         """Parse scraped content using Groq AI with improved prompting"""
+        structured = scraped_data.get('structured_data')
+        if recipe_render.is_complete(structured):
+            print("📋 Complete structured recipe found, skipping AI")
+            return recipe_render.render_markdown(structured)
+
         print("🤖 Analyzing content with AI...")
         
         # Use the full text content for AI analysis
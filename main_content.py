@@ -0,0 +1,114 @@
+"""
+Readability-style main-content selection for recipe pages.
+
+A fetched page's visible text is mostly not the recipe: navigation, the
+blogger's story, related-recipe teasers, comments and newsletter offers.
+scrape_url used to send all of it to the LLM, cut off at 15k characters,
+which on long blog pages could drop the method entirely.
+
+main_text() scores each text block (one line of page_extract's visible
+text, with the share of it that sits inside links) on:
+
+- recipe vocabulary: section headings, quantities with units, cooking
+  verbs, times and temperatures, step markers;
+- text and link density: link-heavy blocks are navigation, and long prose
+  with no recipe vocabulary is story or comments;
+- boilerplate phrases: reply, subscribe, cookie, privacy and friends.
+
+Each block's score is offset so that ordinary prose is negative, and the
+highest-scoring contiguous run of blocks is kept as the recipe-bearing
+region. When nothing looks like a recipe the full text is returned, so a
+page this cannot make sense of is no worse off than before.
+
+bench_main_content.py reports the prompt reduction over saved pages.
+"""
+
+import re
+
+
+# Blocks kept either side of the selected region, for headings and notes
+CONTEXT_BLOCKS = 1
+# Below this the "region" is more likely a stray match than a recipe
+MIN_REGION_CHARS = 200
+
+_HEADING_RE = re.compile(
+    r'^(?:ingredients?|method|instructions?|directions?|steps?|preparation|how to make\b.*|to serve|'
+    r'for the [\w\s]+|you will need|equipment)\s*:?$',
+    re.IGNORECASE,
+)
+_QUANTITY_RE = re.compile(
+    r'\d\s*(?:g|kg|ml|l|litres?|liters?|tbsps?|tsps?|tablespoons?|teaspoons?|cups?|oz|ounces?|lbs?|pounds?|'
+    r'cloves?|pinch|handful|cans?|tins?|slices?|sprigs?|bunch)\b|[½⅓⅔¼¾]',
+    re.IGNORECASE,
+)
+_VERB_RE = re.compile(
+    r'\b(?:heat|add|stir|cook|bake|fry|simmer|boil|mix|whisk|drain|serve|chop|preheat|season|roast|grill|'
+    r'combine|pour|bring|reduce|fold|knead|place|remove|transfer|sprinkle|toss|blend|marinate|slice|'
+    r'peel|grate|melt|beat|cover|rest|cool|garnish)\b',
+    re.IGNORECASE,
+)
+_TIME_TEMP_RE = re.compile(r'\d\s*(?:mins?|minutes|hours?|hrs?)\b|\d\s*°\s*[CF]\b|\bgas mark\b', re.IGNORECASE)
+_STEP_RE = re.compile(r'^(?:\d{1,2}[.)]\s|step\s*\d|[▢•\-*]\s?)', re.IGNORECASE)
+_BOILERPLATE_RE = re.compile(
+    r'\b(?:reply|comments?|subscribe|newsletter|cookies?|privacy|copyright|all rights reserved|sign up|'
+    r'log in|share|tweet|follow us|affiliate|advertis\w*|votes?|ratings?|published|email|'
+    r'related|you may also like|read more|skip to)\b',
+    re.IGNORECASE,
+)
+
+
+def blocks_from_text(text):
+    """Blocks for text without markup (saved samples, transcripts): one per line, no links."""
+    return [(line, 0) for line in text.split('\n') if line.strip()]
+
+
+def score_block(text, link_chars=0):
+    """Positive for recipe-bearing blocks, negative for prose, navigation and boilerplate."""
+    length = len(text)
+    if not length:
+        return 0.0
+    if length < 60 and _HEADING_RE.match(text.strip()):
+        return 6.0
+
+    vocab = (
+        1.5 * len(_QUANTITY_RE.findall(text))
+        + 0.75 * len(_VERB_RE.findall(text))
+        + 1.0 * len(_TIME_TEMP_RE.findall(text))
+        + (1.0 if _STEP_RE.match(text) else 0.0)
+        # A recipe card flattened into one line still starts with its heading
+        + (3.0 if _HEADING_RE.match(text.lstrip().split(' ', 1)[0]) else 0.0)
+    )
+    link_density = min(link_chars / length, 1.0)
+    boilerplate = min(len(_BOILERPLATE_RE.findall(text)), 3)
+
+    # Every block costs something, more the longer it is, so prose without
+    # recipe vocabulary drags a region's total down
+    return vocab * (1.0 - link_density) - 1.0 - length / 300 - 6.0 * link_density - 2.0 * boilerplate
+
+
+def select_region(blocks):
+    """(start, end) of the highest-scoring contiguous run of blocks, or None."""
+    best, best_range = 0.0, None
+    total, start = 0.0, 0
+    for index, (text, link_chars) in enumerate(blocks):
+        if total <= 0:
+            total, start = 0.0, index
+        total += score_block(text, link_chars)
+        if total > best:
+            best, best_range = total, (start, index + 1)
+    return best_range
+
+
+def main_text(blocks):
+    """The recipe-bearing region of a page's text blocks, or all of it when none stands out."""
+    full = '\n'.join(text for text, _ in blocks)
+    region = select_region(blocks)
+    if region is None:
+        return full
+
+    start, end = max(region[0] - CONTEXT_BLOCKS, 0), min(region[1] + CONTEXT_BLOCKS, len(blocks))
+    selected = blocks[start:end]
+    text = '\n'.join(block for block, _ in selected)
+    if len(text) < MIN_REGION_CHARS or not any(_QUANTITY_RE.search(block) for block, _ in selected):
+        return full
+    return text
@@ -0,0 +1,73 @@
+"""catalog columns and indexes on existing tables
+
+Revision ID: 3f9c2a7d1b64
+Revises: 
+Create Date: 2026-10-18 06:10:00.000000
+
+db.create_all() creates missing tables but never alters one that already
+exists, so databases older than the catalog are missing these. Each step
+checks the live schema first: a table created by create_all() already has
+them, and a table that doesn't exist yet is left to create_all().
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d1b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_unique_s3_key(inspector):
+    if any(c['column_names'] == ['s3_key'] for c in inspector.get_unique_constraints('recipe')):
+        return True
+    return any(i['unique'] and i['column_names'] == ['s3_key'] for i in inspector.get_indexes('recipe'))
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'recipe' in tables:
+        columns = {c['name'] for c in inspector.get_columns('recipe')}
+        indexes = {i['name'] for i in inspector.get_indexes('recipe')}
+        if 'photo_key' not in columns:
+            op.add_column('recipe', sa.Column('photo_key', sa.String(length=300), nullable=True))
+        if not _has_unique_s3_key(inspector):
+            # The catalog can be rebuilt from storage, so keep the oldest row per key
+            op.execute('DELETE FROM recipe WHERE id NOT IN (SELECT MIN(id) FROM recipe GROUP BY s3_key)')
+            op.create_index('uq_recipe_s3_key', 'recipe', ['s3_key'], unique=True)
+        if 'ix_recipe_user_created' not in indexes:
+            op.create_index('ix_recipe_user_created', 'recipe', ['user_id', 'created_at'])
+
+    if 'scrape_job' in tables:
+        columns = {c['name'] for c in inspector.get_columns('scrape_job')}
+        indexes = {i['name'] for i in inspector.get_indexes('scrape_job')}
+        if 'domain' not in columns:
+            op.add_column('scrape_job', sa.Column('domain', sa.String(length=255), nullable=True))
+        if 'ix_scrape_job_status_domain' not in indexes:
+            op.create_index('ix_scrape_job_status_domain', 'scrape_job', ['status', 'domain'])
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'scrape_job' in tables:
+        if 'ix_scrape_job_status_domain' in {i['name'] for i in inspector.get_indexes('scrape_job')}:
+            op.drop_index('ix_scrape_job_status_domain', table_name='scrape_job')
+        if 'domain' in {c['name'] for c in inspector.get_columns('scrape_job')}:
+            with op.batch_alter_table('scrape_job') as batch_op:
+                batch_op.drop_column('domain')
+
+    if 'recipe' in tables:
+        indexes = {i['name'] for i in inspector.get_indexes('recipe')}
+        if 'ix_recipe_user_created' in indexes:
+            op.drop_index('ix_recipe_user_created', table_name='recipe')
+        if 'uq_recipe_s3_key' in indexes:
+            op.drop_index('uq_recipe_s3_key', table_name='recipe')
+        if 'photo_key' in {c['name'] for c in inspector.get_columns('recipe')}:
+            with op.batch_alter_table('recipe') as batch_op:
+                batch_op.drop_column('photo_key')
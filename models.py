@@ -12,10 +12,84 @@ class User(db.Model, UserMixin):
     recipes = db.relationship('Recipe', backref='user', lazy=True)
 
 class Recipe(db.Model):
+    # Listings page through one user's recipes newest-first, so index that path
+    __table_args__ = (
+        db.Index('ix_recipe_user_created', 'user_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
-    s3_key = db.Column(db.String(300), nullable=False)
+    s3_key = db.Column(db.String(300), nullable=False, unique=True)
     source = db.Column(db.String(100), nullable=True)
+    photo_key = db.Column(db.String(300), nullable=True)  # original photo of an OCR recipe
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+class RecipeCounter(db.Model):
+    # Materialised COUNT(*) of Recipe rows per (user, source), kept in step by
+    # catalog.py in the same transaction as the Recipe insert/delete so the
+    # dashboards never have to scan the catalog. '' stands for manual/photo
+    # recipes because a primary key column can't be NULL.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    source = db.Column(db.String(100), primary_key=True, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ScrapeBatch(db.Model):
+    # One POST /api/scrape/batch; its URLs are ordinary ScrapeJob rows
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class ScrapeJob(db.Model):
+    # Durable queue behind POST /api/scrape; workers in scrape_jobs.py claim
+    # queued rows (or running rows whose lease expired) oldest first, with
+    # single scrapes ahead of batch items
+    __table_args__ = (
+        db.Index('ix_scrape_job_status_created', 'status', 'created_at'),
+        db.Index('ix_scrape_job_status_domain', 'status', 'domain'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    batch_id = db.Column(db.String(32), db.ForeignKey('scrape_batch.id'), nullable=True, index=True)
+    url = db.Column(db.String(2048), nullable=False)
+    domain = db.Column(db.String(255), nullable=True)  # catalog.source_from_url(url), for per-site limits
+    refresh = db.Column(db.Boolean, nullable=False, default=False)  # bypass the extraction cache
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued | running | succeeded | failed
+    result = db.Column(db.Text, nullable=True)  # JSON from scrape_and_save, minus the markdown body
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+
+class ExtractionCache(db.Model):
+    # Finished markdown keyed by sha256(canonical URL + scraped content hash);
+    # see result_cache.py
+    key = db.Column(db.String(64), primary_key=True)
+    canonical_url = db.Column(db.String(2048), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    recipe_name = db.Column(db.String(150), nullable=False)
+    markdown = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    last_hit_at = db.Column(db.DateTime, nullable=True)
+
+class ScrapeFailure(db.Model):
+    # Negative result cache: one row per canonical URL and failure class,
+    # consulted before a scrape until expires_at; see negative_cache.py
+    key = db.Column(db.String(64), primary_key=True)  # sha256(canonical URL + failure class)
+    url_hash = db.Column(db.String(64), nullable=False, index=True)  # sha256(canonical URL)
+    canonical_url = db.Column(db.String(2048), nullable=False)
+    failure_class = db.Column(db.String(32), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    failures = db.Column(db.Integer, nullable=False, default=1)
+    hits = db.Column(db.Integer, nullable=False, default=0)  # scrapes turned away while cached
+    first_failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,197 @@
+"""
+Negative result cache.
+
+A URL that 404s, times out, is a PDF or holds no recipe costs a full fetch
+(and, for NO_RECIPE_FOUND, a Groq call) every time anyone scrapes it.
+scrape_and_save therefore records each failure in the ScrapeFailure table,
+keyed by canonical URL and failure class, and turns later scrapes of the
+same URL away until the entry expires. Rows live in the database so every
+worker process shares them.
+
+Permanent failures (the page is gone, is not a web page, has no recipe)
+are remembered for days; transient ones (timeouts, 5xx, rate limiting) for
+minutes, doubling with each repeat up to 8x. Pass refresh=True (the
+`refresh` flag on /api/scrape) to ignore the cache; a successful scrape
+clears the URL's entries. hot_failures() backs the admin failing-URL view.
+"""
+
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+import requests
+
+import page_fetch
+from models import db, ScrapeFailure
+
+
+# failure class -> (TTL, permanent)
+FAILURE_CLASSES = {
+    'not_found': (timedelta(days=7), True),             # 404, 410
+    'unsupported_content': (timedelta(days=7), True),   # PDF, image, archive...
+    'no_recipe': (timedelta(days=3), True),             # fetched fine, NO_RECIPE_FOUND
+    'forbidden': (timedelta(hours=6), False),           # 401, 403, 451: often bot blocking
+    'client_error': (timedelta(hours=12), False),       # other 4xx
+    'rate_limited': (timedelta(minutes=10), False),     # 429
+    'server_error': (timedelta(minutes=15), False),     # 5xx
+    'fetch_error': (timedelta(minutes=10), False),      # timeout, DNS, connection reset
+    'no_content': (timedelta(hours=1), False),          # empty page or no transcript
+}
+MAX_BACKOFF = 8
+PURGE_EVERY = 100  # records between sweeps of long-expired rows
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'records': 0, 'bypasses': 0, 'errors': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def classify(exc):
+    """(failure class, HTTP status) for an exception raised while fetching a page; class None if unknown."""
+    if isinstance(exc, page_fetch.UnsupportedContentError):
+        return 'unsupported_content', None
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        if status in (404, 410):
+            return 'not_found', status
+        if status in (401, 403, 451):
+            return 'forbidden', status
+        if status == 429:
+            return 'rate_limited', status
+        if status >= 500:
+            return 'server_error', status
+        return 'client_error', status
+    if isinstance(exc, requests.RequestException):
+        return 'fetch_error', None
+    return None, None
+
+
+def lookup(canonical_url, refresh=False):
+    """Return the live ScrapeFailure for `canonical_url`, or None. Cache errors count as a miss."""
+    if refresh:
+        _count('bypasses')
+        return None
+    try:
+        now = datetime.utcnow()
+        entry = (
+            ScrapeFailure.query
+            .filter(ScrapeFailure.url_hash == _hash(canonical_url), ScrapeFailure.expires_at > now)
+            .order_by(ScrapeFailure.expires_at.desc())
+            .first()
+        )
+        if entry is None:
+            _count('misses')
+            return None
+        ScrapeFailure.query.filter_by(key=entry.key).update({
+            ScrapeFailure.hits: ScrapeFailure.hits + 1,
+            ScrapeFailure.last_hit_at: now,
+        }, synchronize_session=False)
+        db.session.commit()
+        _count('hits')
+        return entry
+    except Exception as e:
+        db.session.rollback()
+        print(f"Negative cache lookup failed: {e}")
+        _count('errors')
+        return None
+
+
+def record(canonical_url, failure_class, error=None, status_code=None):
+    try:
+        ttl, permanent = FAILURE_CLASSES[failure_class]
+        now = datetime.utcnow()
+        key = _hash(f"{canonical_url}\n{failure_class}")
+        entry = db.session.get(ScrapeFailure, key)
+        if entry is None:
+            entry = ScrapeFailure(
+                key=key, url_hash=_hash(canonical_url), canonical_url=canonical_url[:2048],
+                failure_class=failure_class, failures=0, hits=0, first_failed_at=now,
+            )
+            db.session.add(entry)
+        entry.failures += 1
+        entry.status_code = status_code
+        entry.error = (error or '')[:500] or None
+        entry.last_failed_at = now
+        if not permanent:
+            ttl *= min(2 ** (entry.failures - 1), MAX_BACKOFF)
+        entry.expires_at = now + ttl
+        db.session.commit()
+        _count('records')
+        with _stats_lock:
+            purge = _stats['records'] % PURGE_EVERY == 0
+        if purge:
+            purge_expired()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Negative cache record failed: {e}")
+        _count('errors')
+
+
+def clear(canonical_url):
+    """Forget every failure recorded for `canonical_url`, after it scraped successfully."""
+    try:
+        ScrapeFailure.query.filter_by(url_hash=_hash(canonical_url)).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Negative cache clear failed: {e}")
+        _count('errors')
+
+
+def purge_expired(grace=timedelta(days=1)):
+    """Delete rows that expired more than `grace` ago; returns how many went."""
+    deleted = ScrapeFailure.query.filter(
+        ScrapeFailure.expires_at < datetime.utcnow() - grace
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def retry_after(entry):
+    return max(int((entry.expires_at - datetime.utcnow()).total_seconds()), 0)
+
+
+def serialize(entry):
+    return {
+        'url': entry.canonical_url,
+        'failure_class': entry.failure_class,
+        'permanent': FAILURE_CLASSES.get(entry.failure_class, (None, False))[1],
+        'status_code': entry.status_code,
+        'error': entry.error,
+        'failures': entry.failures,
+        'hits': entry.hits,
+        'first_failed_at': entry.first_failed_at.isoformat() if entry.first_failed_at else None,
+        'last_failed_at': entry.last_failed_at.isoformat() if entry.last_failed_at else None,
+        'expires_at': entry.expires_at.isoformat(),
+        'retry_after': retry_after(entry),
+    }
+
+
+def hot_failures(limit=50):
+    """Live entries, the ones that cost the most requests first."""
+    return (
+        ScrapeFailure.query
+        .filter(ScrapeFailure.expires_at > datetime.utcnow())
+        .order_by((ScrapeFailure.hits + ScrapeFailure.failures).desc(), ScrapeFailure.last_failed_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def stats():
+    """Counters for this process plus the number of live entries in the shared table."""
+    with _stats_lock:
+        result = dict(_stats)
+    try:
+        result['entries'] = ScrapeFailure.query.filter(ScrapeFailure.expires_at > datetime.utcnow()).count()
+    except Exception:
+        db.session.rollback()
+        result['entries'] = None
+    return result
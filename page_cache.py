@@ -0,0 +1,249 @@
+"""
+Disk-backed HTTP page cache for RecipeScraper.scrape_url.
+
+Pages are stored under PAGE_CACHE_DIR (default instance/page_cache) keyed
+by a hash of the normalised URL: one file for the body and a .json sidecar
+holding the final URL, ETag, Last-Modified and when the copy was fetched.
+
+A copy younger than PAGE_CACHE_TTL seconds (default one day) is served
+without touching the network. An older copy is revalidated with
+If-None-Match / If-Modified-Since, so an unchanged page costs a 304
+instead of the full download. When the cache grows past
+PAGE_CACHE_MAX_BYTES (default 256 MB) the least recently used pages are
+evicted. PAGE_CACHE_MAX_BYTES=0 turns the cache off.
+
+Network reads go through page_fetch.fetch, so a cached body may be cut
+short at the size cap, after its ld+json Recipe or at a WPRM recipe id;
+the sidecar records which in 'stopped'. fetch(early_stop=False) treats
+copies stopped early (after the Recipe or at the WPRM id) as missing and
+downloads the whole page, since its caller needs more than the head.
+
+The directory can be shared by several processes: files are written
+atomically and the size budget is re-measured from disk before evicting.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import page_fetch
+
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EARLY_STOPS = ('recipe', 'wprm')  # FetchedPage.stopped values that leave out the rest of the page
+
+
+def normalize_url(url):
+    """Lower-case scheme and host, drop default ports and the fragment, and sort the query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+class CachedPage:
+    """The parts of a requests.Response that the scrapers use."""
+
+    def __init__(self, url, content, headers, cache_status, stopped=None):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.cache_status = cache_status  # 'fresh', 'revalidated', 'miss' or 'bypass'
+        self.stopped = stopped  # see page_fetch.FetchedPage
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class PageCache:
+    def __init__(self, directory=None, ttl=None, max_bytes=None):
+        self.directory = os.path.abspath(directory or os.getenv('PAGE_CACHE_DIR', os.path.join('instance', 'page_cache')))
+        self.ttl = int(os.getenv('PAGE_CACHE_TTL', DEFAULT_TTL)) if ttl is None else ttl
+        self.max_bytes = int(os.getenv('PAGE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)) if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes = None  # measured lazily, then tracked per write
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _paths(self, url):
+        digest = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        directory = os.path.join(self.directory, digest[:2])
+        return os.path.join(directory, digest), os.path.join(directory, digest + '.json')
+
+    def fetch(self, session, url, timeout=10, early_stop=None):
+        """
+        GET `url` through `session`, using the cached copy when it is fresh or
+        still valid. Raises like session.get / raise_for_status on failure.
+        early_stop is passed on to page_fetch.fetch.
+        """
+        if not self.enabled:
+            response = page_fetch.fetch(session, url, timeout=timeout, early_stop=early_stop)
+            return CachedPage(response.url, response.content, response.headers, 'bypass', response.stopped)
+
+        body_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path)
+        if meta is not None and early_stop is False and meta.get('stopped') in EARLY_STOPS:
+            meta = None
+        if meta is not None and time.time() - meta['fetched_at'] < self.ttl:
+            content = self._read_body(body_path)
+            if content is not None:
+                self._touch(meta_path)
+                with self._lock:
+                    self.fresh_hits += 1
+                return CachedPage(meta['url'], content, meta['headers'], 'fresh', meta.get('stopped'))
+            meta = None
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = page_fetch.fetch(session, url, timeout=timeout, headers=headers, early_stop=early_stop)
+        if response.status_code == 304 and meta is not None:
+            content = self._read_body(body_path)
+            if content is not None:
+                meta['fetched_at'] = time.time()
+                self._write(meta_path, json.dumps(meta).encode('utf-8'))
+                with self._lock:
+                    self.revalidated += 1
+                return CachedPage(meta['url'], content, meta['headers'], 'revalidated', meta.get('stopped'))
+            # Body vanished between the two reads: fall back to an unconditional GET
+            response = page_fetch.fetch(session, url, timeout=timeout, early_stop=early_stop)
+
+        with self._lock:
+            self.misses += 1
+        if 'no-store' not in response.headers.get('Cache-Control', '').lower():
+            self._store(body_path, meta_path, response)
+        return CachedPage(response.url, response.content, response.headers, 'miss', response.stopped)
+
+    def _store(self, body_path, meta_path, response):
+        kept_headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+        meta = {
+            'url': response.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': kept_headers,
+            'fetched_at': time.time(),
+            'size': len(response.content),
+            'stopped': response.stopped,
+        }
+        if meta['size'] > self.max_bytes:
+            return
+        try:
+            self._write(body_path, response.content)
+            self._write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            print(f"Page cache write failed for {response.url}: {e}")
+            return
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._measure()
+            else:
+                self._approx_bytes += meta['size']
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _entries(self):
+        """Yield (meta_path, body_path, size, last_used) for every cached page on disk."""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                meta_path = os.path.join(root, name)
+                body_path = meta_path[:-len('.json')]
+                try:
+                    size = os.path.getsize(body_path)
+                    last_used = os.path.getmtime(meta_path)
+                except OSError:
+                    continue
+                yield meta_path, body_path, size, last_used
+
+    def _measure(self):
+        return sum(size for _, _, size, _ in self._entries())
+
+    def _evict(self):
+        """Drop least recently used pages until the cache is back under 90% of its budget."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[3])
+            total = sum(entry[2] for entry in entries)
+            target = self.max_bytes * 0.9
+            for meta_path, body_path, size, _ in entries:
+                if total <= target:
+                    break
+                for path in (meta_path, body_path):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                total -= size
+                self.evictions += 1
+            self._approx_bytes = total
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _read_body(self, body_path):
+        try:
+            with open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _touch(self, meta_path):
+        """The sidecar's mtime doubles as the last-used time for LRU eviction."""
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+
+    def _write(self, path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'fresh_hits': self.fresh_hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'approx_bytes': self._approx_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+            }
@@ -0,0 +1,142 @@
+"""
+Streaming, size-capped page download.
+
+Used by PageCache for every network fetch, instead of a plain session.get
+that buffers the whole body. The response is read in chunks and:
+
+- rejected early when it is not an HTML/text page, judged from the
+  Content-Type header and, when that is missing or generic, by sniffing the
+  first bytes (PDFs, images, archives and the like never get downloaded);
+- cut off at PAGE_FETCH_MAX_BYTES (default 3 MB); recipe blogs ship
+  multi-megabyte pages of ads and comments but only the first 15k chars
+  of text are ever used;
+- stopped as soon as a complete ld+json Recipe has been read, since
+  scrape_and_save renders that directly and never needs the rest of the
+  page, or as soon as a WordPress Recipe Maker recipe id shows up, since
+  scrape_url then fetches the recipe as JSON (see wprm.py). Set
+  PAGE_FETCH_EARLY_STOP=0 to always read to the cap.
+"""
+
+import os
+import re
+
+import recipe_render
+import structured_data
+import wprm
+
+
+DEFAULT_MAX_BYTES = 3 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+TEXT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'application/xml', 'text/xml')
+GENERIC_TYPES = ('', 'application/octet-stream', 'binary/octet-stream')
+BINARY_SIGNATURES = (
+    b'%PDF', b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'PK\x03\x04', b'\x1f\x8b', b'RIFF',
+    b'ID3', b'\x00\x00\x00', b'OggS', b'fLaC', b'Rar!', b'7z\xbc\xaf', b'\x7fELF', b'MZ',
+)
+
+
+class UnsupportedContentError(Exception):
+    """The URL does not point at an HTML or text page."""
+
+
+class FetchedPage:
+    """The parts of a requests.Response that PageCache and the scrapers use."""
+
+    def __init__(self, url, status_code, headers, content=b'', stopped=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        # None, 'recipe' (complete ld+json seen), 'wprm' (WPRM recipe id seen) or 'cap' (PAGE_FETCH_MAX_BYTES)
+        self.stopped = stopped
+
+
+class _RecipeWatcher:
+    """Spots a complete ld+json Recipe or a WPRM recipe id in a growing buffer without rescanning it from the start."""
+
+    OPEN_RE = re.compile(rb'<script[^>]*?application/ld\+json[^>]*>', re.IGNORECASE)
+    CLOSE_RE = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+    def __init__(self):
+        self.pos = 0
+        self.block_start = None
+        self.wprm_pos = 0
+
+    def stop_reason(self, buffer):
+        if self.seen_complete_recipe(buffer):
+            return 'recipe'
+        # Tags may straddle chunk boundaries, so look back a little
+        recipe_id = wprm.find_recipe_id(buffer, max(self.wprm_pos - 512, 0))
+        self.wprm_pos = len(buffer)
+        return 'wprm' if recipe_id else None
+
+    def seen_complete_recipe(self, buffer):
+        while True:
+            if self.block_start is None:
+                match = self.OPEN_RE.search(buffer, self.pos)
+                if not match:
+                    # An opening tag may straddle the next chunk boundary
+                    self.pos = max(self.pos, len(buffer) - 256)
+                    return False
+                self.block_start = self.pos = match.end()
+            match = self.CLOSE_RE.search(buffer, self.pos)
+            if not match:
+                self.pos = max(self.pos, len(buffer) - 16)
+                return False
+            raw = bytes(buffer[self.block_start:match.start()]).decode('utf-8', 'replace').strip()
+            self.block_start, self.pos = None, match.end()
+            if raw and recipe_render.is_complete(structured_data.best_recipe(structured_data.loads(raw))):
+                return True
+
+
+def _check_content_type(url, content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type and media_type not in GENERIC_TYPES and not media_type.startswith(TEXT_TYPES):
+        raise UnsupportedContentError(f"{url} is {media_type}, not a web page")
+
+
+def _sniff(url, head):
+    """Catch binaries served as text/html or with no useful Content-Type."""
+    if any(head.startswith(signature) for signature in BINARY_SIGNATURES):
+        raise UnsupportedContentError(f"{url} looks like a binary file, not a web page")
+
+
+def fetch(session, url, timeout=10, headers=None, max_bytes=None, early_stop=None):
+    """
+    GET `url` as a stream. Raises requests.HTTPError for error statuses and
+    UnsupportedContentError for non-page content. A 304 is returned as-is
+    with an empty body.
+    """
+    max_bytes = int(os.getenv('PAGE_FETCH_MAX_BYTES', DEFAULT_MAX_BYTES)) if max_bytes is None else max_bytes
+    if early_stop is None:
+        early_stop = os.getenv('PAGE_FETCH_EARLY_STOP', '1').lower() not in ('0', 'false', 'no')
+
+    response = session.get(url, timeout=timeout, headers=headers or None, stream=True)
+    try:
+        response.raise_for_status()
+        if response.status_code == 304:
+            return FetchedPage(response.url, 304, response.headers)
+
+        # Decided from the headers alone, before any of the body is read
+        _check_content_type(url, response.headers.get('Content-Type', ''))
+
+        buffer = bytearray()
+        watcher = _RecipeWatcher() if early_stop else None
+        stopped = None
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if not buffer:
+                _sniff(url, chunk[:16])
+            buffer += chunk
+            if len(buffer) >= max_bytes:
+                del buffer[max_bytes:]
+                stopped = 'cap'
+                break
+            if watcher is not None:
+                stopped = watcher.stop_reason(buffer)
+                if stopped:
+                    break
+        return FetchedPage(response.url, response.status_code, response.headers, bytes(buffer), stopped)
+    finally:
+        # Closing drops the connection when the body was not read to the end
+        response.close()
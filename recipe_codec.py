@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Optional compression for stored recipe markdown.
+
+RECIPE_STORAGE_CODEC chooses how new recipes are written:
+    plain - UTF-8 as-is (default)
+    gzip  - standard gzip
+    zstd  - zstd with a dictionary trained on recipe_*.md (needs the
+            zstandard package and recipe_zstd.dict)
+
+The codec is recorded in the object's metadata, so reads decode old
+(plain) and new objects transparently whatever the current setting is.
+
+Retrain the dictionary with:  python recipe_codec.py train
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import threading
+
+try:
+    import zstandard
+except ImportError:  # Only needed when the zstd codec is used
+    zstandard = None
+
+
+CODECS = ('plain', 'gzip', 'zstd')
+DICTIONARY_PATH = os.getenv(
+    'RECIPE_ZSTD_DICT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recipe_zstd.dict')
+)
+
+
+def load_dictionary(path=DICTIONARY_PATH):
+    if zstandard is None:
+        raise ValueError("The zstd recipe codec requires the 'zstandard' package")
+    try:
+        with open(path, 'rb') as f:
+            return zstandard.ZstdCompressionDict(f.read())
+    except OSError as e:
+        raise ValueError(f"Could not load zstd dictionary {path}: {e}")
+
+
+def train_dictionary(paths, dict_size=4096):
+    """Train a zstd dictionary from markdown recipe files."""
+    if zstandard is None:
+        raise ValueError("Training a dictionary requires the 'zstandard' package")
+    samples = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            samples.append(f.read())
+    return zstandard.train_dictionary(dict_size, samples)
+
+
+class RecipeCodec:
+    def __init__(self, name='plain', dictionary_path=DICTIONARY_PATH, level=19):
+        if name not in CODECS:
+            raise ValueError(f"Unknown recipe codec '{name}', expected one of {', '.join(CODECS)}")
+        self.name = name
+        self.level = level
+        self.dictionary_path = dictionary_path
+        self._dictionary = None
+        # zstd (de)compressor objects must not be shared between threads
+        self._local = threading.local()
+        if name == 'zstd':
+            # Fail at startup rather than on the first save
+            self.get_dictionary()
+
+    def get_dictionary(self):
+        if self._dictionary is None:
+            self._dictionary = load_dictionary(self.dictionary_path)
+            self._dictionary.precompute_compress(level=self.level)
+        return self._dictionary
+
+    def _compressor(self):
+        if not hasattr(self._local, 'compressor'):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.get_dictionary())
+        return self._local.compressor
+
+    def _decompressor(self):
+        if not hasattr(self._local, 'decompressor'):
+            self._local.decompressor = zstandard.ZstdDecompressor(dict_data=self.get_dictionary())
+        return self._local.decompressor
+
+    def encode(self, content):
+        """Return (body bytes, extra S3 metadata) for a recipe."""
+        raw = content.encode('utf-8')
+        if self.name == 'gzip':
+            return gzip.compress(raw, mtime=0), {'codec': 'gzip'}
+        if self.name == 'zstd':
+            return self._compressor().compress(raw), {
+                'codec': 'zstd',
+                'zstd-dict': str(self.get_dictionary().dict_id()),
+            }
+        return raw, {}
+
+    def decode(self, body, metadata):
+        """Inverse of encode for any codec, driven by the object's metadata."""
+        codec = (metadata or {}).get('codec', 'plain')
+        if codec == 'gzip':
+            return gzip.decompress(body).decode('utf-8')
+        if codec == 'zstd':
+            expected = (metadata or {}).get('zstd-dict')
+            dictionary_id = str(self.get_dictionary().dict_id())
+            if expected and expected != dictionary_id:
+                raise ValueError(f"Recipe was compressed with zstd dictionary {expected}, "
+                                 f"but {self.dictionary_path} is {dictionary_id}")
+            return self._decompressor().decompress(body).decode('utf-8')
+        return body.decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recipe storage codec tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help='Train the zstd dictionary from recipe_*.md files')
+    train.add_argument('--size', type=int, default=4096, help='Dictionary size in bytes')
+    train.add_argument('--output', default=DICTIONARY_PATH)
+    train.add_argument('paths', nargs='*', help='Markdown files (default: recipe_*.md)')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        paths = args.paths or sorted(glob.glob('recipe_*.md'))
+        dictionary = train_dictionary(paths, args.size)
+        with open(args.output, 'wb') as f:
+            f.write(dictionary.as_bytes())
+        print(f"Trained dictionary {dictionary.dict_id()} ({len(dictionary.as_bytes())} bytes) "
+              f"from {len(paths)} recipes -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Streaming cookbook export.
+
+Builds a zip or tar.gz archive on the fly from stored recipe objects and
+yields it chunk by chunk, so memory stays flat however large the cookbook is.
+"""
+
+import io
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+FORMATS = {
+    'zip': 'application/zip',
+    'tar.gz': 'application/gzip',
+}
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink; the archive writers append and we drain after each file."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def prefetch(keys, fetch, window):
+    """
+    Yield (key, content) in order while up to `window` fetches run ahead in a thread pool.
+    Keys that fail to fetch are logged and skipped.
+    """
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        pending = deque()
+
+        def next_ready():
+            key, future = pending.popleft()
+            try:
+                return key, future.result()
+            except Exception as e:
+                print(f"Export skipped {key}: {e}")
+                return key, None
+
+        for key in keys:
+            pending.append((key, pool.submit(fetch, key)))
+            if len(pending) >= window:
+                key, content = next_ready()
+                if content is not None:
+                    yield key, content
+        while pending:
+            key, content = next_ready()
+            if content is not None:
+                yield key, content
+
+
+def stream_archive(files, fmt='zip'):
+    """
+    Turn an iterable of (archive path, text) into archive bytes, yielded as each file is added.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+
+    sink = _ChunkBuffer()
+    now = time.time()
+
+    if fmt == 'zip':
+        # zipfile falls back to data descriptors on a non-seekable stream
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files:
+                info = zipfile.ZipInfo(name, date_time=time.localtime(now)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, content.encode('utf-8'))
+                yield sink.drain()
+    else:
+        with tarfile.open(fileobj=sink, mode='w|gz') as archive:
+            for name, content in files:
+                data = content.encode('utf-8')
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = now
+                archive.addfile(info, io.BytesIO(data))
+                yield sink.drain()
+
+    # Central directory / gzip trailer
+    yield sink.drain()
@@ -0,0 +1,204 @@
+"""
+Deterministic schema.org Recipe -> markdown renderer.
+
+Most large recipe sites publish a complete JSON-LD Recipe: the ingredient
+list and every method step, which is exactly what parse_with_ai asks the
+LLM to reproduce. When that data is complete, render_markdown() produces
+the same "# Title / **Ingredients:** / **Method:**" layout directly, and
+the Groq call is skipped. Measurements are converted to metric by fixed
+rules rather than by the model.
+"""
+
+import html
+import re
+
+
+MIN_INGREDIENTS = 2
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+_SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.,;:!?)])')
+
+_FRACTIONS = {'½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75, '⅛': 0.125, '⅜': 0.375, '⅝': 0.625, '⅞': 0.875}
+_NUMBER = r'(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[½⅓⅔¼¾⅛⅜⅝⅞]|\d+(?:\.\d+)?|[½⅓⅔¼¾⅛⅜⅝⅞])'
+
+# unit pattern -> (metric unit, factor)
+_UNITS = [
+    (r'fl\.?\s*oz|fluid\s+ounces?', 'ml', 29.57),
+    (r'cups?', 'ml', 240.0),
+    (r'tablespoons?|tbsps?|tbls?|tbs', 'ml', 15.0),
+    (r'teaspoons?|tsps?', 'ml', 5.0),
+    (r'pints?', 'ml', 473.0),
+    (r'quarts?', 'ml', 946.0),
+    (r'gallons?', 'ml', 3785.0),
+    (r'pounds?|lbs?', 'g', 453.6),
+    (r'ounces?|oz', 'g', 28.35),
+]
+# In a method step a dot after a unit is only the abbreviation's ("1 tsp. salt",
+# "2 oz.)") when more of the phrase follows; before a capital or at the end it
+# ends the sentence ("Add 2 cups."). Ingredient lines aren't sentences, so
+# there it always belongs to the unit ("2 tbsp. Butter", "1 lb. Chicken thighs").
+_ABBREV_DOT = r'(?:\.(?=\s*(?-i:[a-z0-9])|[),;]))'
+
+
+def _unit_patterns(dot):
+    unit_re = re.compile(
+        r'(?<![\w/.])(?P<qty>' + _NUMBER + r')(?:\s*(?:-|–|to)\s*(?P<qty2>' + _NUMBER + r'))?\s*'
+        r'(?P<unit>' + '|'.join(f'(?:{pattern})' for pattern, _, _ in _UNITS) + r')' + dot + r'?(?![a-zA-Z])',
+        re.IGNORECASE,
+    )
+    # "200g/7oz", "200g (7oz)", "500ml/2 cups": keep the metric half only
+    dual_re = re.compile(
+        r'(?P<metric>' + _NUMBER + r'\s*(?:g|kg|ml|l|litres?|liters?))\s*(?:/|\(|\bor\b)\s*'
+        + _NUMBER + r'(?:\s*(?:-|–|to)\s*' + _NUMBER + r')?\s*(?:' + '|'.join(f'(?:{p})' for p, _, _ in _UNITS) + r')' + dot + r'?\)?',
+        re.IGNORECASE,
+    )
+    return unit_re, dual_re
+
+
+_UNIT_RE, _DUAL_RE = _unit_patterns(_ABBREV_DOT)
+_INGREDIENT_UNIT_RE, _INGREDIENT_DUAL_RE = _unit_patterns(r'\.')
+_FAHRENHEIT_PAIR_RE = re.compile(r'(\d{2,3})\s*°?\s*F\b\s*[/(]\s*(\d{2,3})\s*°?\s*C\b\)?')
+_CELSIUS_PAIR_RE = re.compile(r'(\d{2,3})\s*°?\s*C\b\s*[/(]\s*\d{2,3}\s*°?\s*F\b\)?')
+_FAHRENHEIT_RE = re.compile(r'(\d{2,3})\s*(?:°\s*|degrees?\s+)F(?:ahrenheit)?\b|\b([2-5]\d{2})\s?F\b', re.IGNORECASE)
+_INCH_PAIR_RE = re.compile(r'(\d+(?:\.\d+)?)\s*[x×]\s*(\d+(?:\.\d+)?)(?:\s*|-)(?:inch(?:es)?|in(?:' + _ABBREV_DOT + r'|(?=\.))|")', re.IGNORECASE)
+_INCH_RE = re.compile(r'(\d+(?:\.\d+)?)(?:\s*|-)(?:inch(?:es)?|in(?:' + _ABBREV_DOT + r'|(?=\.))|")', re.IGNORECASE)
+
+
+def clean_text(value):
+    """Strip tags and entities that sites leave inside JSON-LD strings."""
+    if value is None:
+        return ''
+    text = html.unescape(_TAG_RE.sub(' ', str(value)))
+    return _SPACE_BEFORE_PUNCT_RE.sub(r'\1', _SPACE_RE.sub(' ', text)).strip()
+
+
+def _parse_number(text):
+    text = text.strip()
+    total = 0.0
+    for fraction, value in _FRACTIONS.items():
+        if fraction in text:
+            total += value
+            text = text.replace(fraction, '').strip()
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            total += float(numerator) / float(denominator)
+        elif part:
+            total += float(part)
+    return total
+
+
+def _format_amount(value, unit):
+    if unit == 'ml' and value >= 1000:
+        return f"{round(value / 1000, 1):g}L"
+    if unit == 'g' and value >= 1000:
+        return f"{round(value / 1000, 2):g}kg"
+    if value < 1:
+        return f"{round(value, 2):g}{unit}"
+    if value < 10:
+        return f"{round(value * 4) / 4:g}{unit}"
+    if value < 100:
+        return f"{round(value):g}{unit}"
+    return f"{round(value / 5) * 5:g}{unit}"
+
+
+def _convert_unit(match):
+    unit_text = match.group('unit')
+    for pattern, metric_unit, factor in _UNITS:
+        if re.fullmatch(pattern, unit_text, re.IGNORECASE):
+            break
+    low = _format_amount(_parse_number(match.group('qty')) * factor, metric_unit)
+    if match.group('qty2'):
+        high = _format_amount(_parse_number(match.group('qty2')) * factor, metric_unit)
+        low_unit, high_unit = re.search(r'[a-zA-Z]+$', low).group(), re.search(r'[a-zA-Z]+$', high).group()
+        if low_unit == high_unit:
+            low = low[:-len(low_unit)]
+        return f"{low}-{high}"
+    return low
+
+
+def _to_celsius(fahrenheit):
+    return int(round((int(fahrenheit) - 32) * 5 / 9 / 5) * 5)
+
+
+def to_metric(text, ingredient=False):
+    """Rule-based metric conversion for one ingredient line (ingredient=True) or method step."""
+    unit_re, dual_re = (_INGREDIENT_UNIT_RE, _INGREDIENT_DUAL_RE) if ingredient else (_UNIT_RE, _DUAL_RE)
+    text = dual_re.sub(lambda m: m.group('metric'), text)
+    text = _FAHRENHEIT_PAIR_RE.sub(lambda m: f"{m.group(2)}°C", text)
+    text = _CELSIUS_PAIR_RE.sub(lambda m: f"{m.group(1)}°C", text)
+    text = _FAHRENHEIT_RE.sub(lambda m: f"{_to_celsius(m.group(1) or m.group(2))}°C", text)
+    text = _INCH_PAIR_RE.sub(lambda m: f"{round(float(m.group(1)) * 2.54):g}x{round(float(m.group(2)) * 2.54):g}cm", text)
+    text = _INCH_RE.sub(lambda m: f"{round(float(m.group(1)) * 2.54):g}cm", text)
+    return unit_re.sub(_convert_unit, text)
+
+
+def _types(node):
+    node_type = node.get('@type', '') if isinstance(node, dict) else ''
+    return node_type if isinstance(node_type, list) else [node_type]
+
+
+def _instruction_items(node):
+    """
+    Flatten recipeInstructions into ('section', name) and ('step', text) items.
+    Handles plain strings, HowToStep, HowToSection and ItemList nesting.
+    """
+    if isinstance(node, str):
+        for line in re.split(r'\n+', html.unescape(node)):
+            line = clean_text(line)
+            if line:
+                yield 'step', line
+        return
+    if isinstance(node, list):
+        for child in node:
+            yield from _instruction_items(child)
+        return
+    if not isinstance(node, dict):
+        return
+    types = _types(node)
+    children = node.get('itemListElement')
+    if 'HowToSection' in types or (children and 'HowToStep' not in types):
+        name = clean_text(node.get('name'))
+        if name:
+            yield 'section', name
+        yield from _instruction_items(children or [])
+        return
+    text = clean_text(node.get('text') or node.get('name'))
+    if text:
+        yield 'step', text
+    elif children:
+        yield from _instruction_items(children)
+
+
+def _ingredients(recipe):
+    raw = recipe.get('recipeIngredient') or recipe.get('ingredients') or []
+    if isinstance(raw, str):
+        raw = [raw]
+    return [text for text in (clean_text(item) for item in raw if isinstance(item, (str, int, float))) if text]
+
+
+def is_complete(recipe):
+    """True when a JSON-LD Recipe has a name, ingredients and at least one method step."""
+    if not isinstance(recipe, dict) or 'Recipe' not in _types(recipe):
+        return False
+    if not clean_text(recipe.get('name')):
+        return False
+    if len(_ingredients(recipe)) < MIN_INGREDIENTS:
+        return False
+    return any(kind == 'step' for kind, _ in _instruction_items(recipe.get('recipeInstructions')))
+
+
+def render_markdown(recipe):
+    """Render a complete JSON-LD Recipe in the layout parse_with_ai asks the LLM for."""
+    lines = [f"# {clean_text(recipe.get('name'))}", '', '**Ingredients:**']
+    lines.extend(f"• {to_metric(ingredient, ingredient=True)}" for ingredient in _ingredients(recipe))
+    lines.extend(['', '**Method:**'])
+    number = 0
+    for kind, text in _instruction_items(recipe.get('recipeInstructions')):
+        if kind == 'section':
+            lines.extend(['', f"**{text.rstrip(':')}:**"])
+        else:
+            number += 1
+            lines.append(f"{number}. {to_metric(text)}")
+    return '\n'.join(lines)
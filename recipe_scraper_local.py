@@ -20,6 +20,7 @@ from flask_login import LoginManager, current_user, login_user, logout_user, log
 from flask_sqlalchemy import SQLAlchemy
 from auth import auth_bp
 from admin import admin_bp
+from page_cache import PageCache
 
 
 load_dotenv()
@@ -72,6 +73,7 @@ class RecipeScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.page_cache = PageCache()
 
     @app.route('/auth', methods=['GET'])
     def auth_page():
@@ -304,8 +306,9 @@ class RecipeScraper:
             return self.extract_youtube_transcript(url)
         
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            # Served from the on-disk page cache when fresh or still valid (304).
+            # This scraper has no structured-data fast path, so it needs the whole page
+            response = self.page_cache.fetch(self.session, url, timeout=10, early_stop=False)
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
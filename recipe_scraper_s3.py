@@ -7,24 +7,35 @@ import os
 import sys
 import subprocess
 import webbrowser
-import json
-import boto3
 from datetime import datetime
-from flask import Flask, redirect, render_template, render_template_string, jsonify, request, session, url_for
+from flask import Flask, Response, redirect, render_template, render_template_string, jsonify, request, session, url_for
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse
 import openai
 import yt_dlp
 from dotenv import load_dotenv
-from botocore.exceptions import ClientError, NoCredentialsError
 from PIL import Image, ImageOps
 import pytesseract
 import traceback
+import time
+import uuid
+import click
 from auth import auth_bp
-from models import User, Recipe, db
+from models import User, db
+import catalog
+import main_content
+import negative_cache
+import page_extract
+import recipe_render
+import result_cache
+import scrape_jobs
+import site_adapters
+import wprm
+from page_cache import EARLY_STOPS, PageCache
+from recipe_export import FORMATS as EXPORT_FORMATS
+from storage import PHOTO_EXTENSIONS, create_storage, is_photo_key
 # from admin import admin_bp
 from flask_migrate import Migrate
 from flask_login import LoginManager, current_user, login_user, logout_user, login_required
@@ -61,189 +72,6 @@ with app.app_context():
     db.create_all()
 
 
-class S3Storage:
-    def __init__(self):
-        self.bucket_name = os.getenv('AWS_S3_BUCKET')
-        if not self.bucket_name:
-            raise ValueError("AWS_S3_BUCKET environment variable is required")
-        
-        try:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_REGION', 'us-east-1')
-            )
-            # Test connection
-            self.s3_client.head_bucket(Bucket=self.bucket_name)
-        except (NoCredentialsError, ClientError) as e:
-            raise ValueError(f"AWS S3 configuration error: {str(e)}")
-    
-# In class S3Storage:
-    def save_recipe(self, filename, content, recipe_name, user_id):
-        try:
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=f"recipes/{user_id}/{filename}",  # <--- Uses user_id
-                Body=content.encode('utf-8'),
-                ContentType='text/markdown',
-                Metadata={
-                    'created': datetime.now().isoformat(),
-                    'type': 'recipe',
-                    'recipe-name': recipe_name
-                }
-            )
-            return True
-        except ClientError:
-            return False
-        
-        
-    def get_recipe(self, filename, user_id):
-        try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=f"recipes/{user_id}/{filename}"  # <--- Uses user_id
-            )
-            return response['Body'].read().decode('utf-8')
-        except ClientError:
-            return None
-        
-    def get_recipe_metadata(self, key):
-        """
-        Helper function to get just the metadata and last-modified time of an S3 object.
-        This uses a fast HEAD request instead of downloading the whole file.
-        """
-        try:
-            response = self.s3_client.head_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
-            # S3 metadata keys are auto-lowercased, so 'recipe-name' is correct
-            return response.get('Metadata', {}), response.get('LastModified')
-        except ClientError:
-            return None, None
-    
-# In class S3Storage:
-    def list_recipes(self, user_id):
-        try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=f"recipes/{user_id}/recipe_"  # <--- Uses user_id
-            )
-            
-            recipes = []
-            for obj in response.get('Contents', []):
-                filename = obj['Key'].replace(f'recipes/{user_id}/', '') 
-                if not filename.endswith('.md'):
-                    continue
-                    
-                try:
-                    metadata, last_modified = self.get_recipe_metadata(obj['Key'])
-                    
-                    if metadata and 'recipe-name' in metadata:
-                        recipe_name = metadata.get('recipe-name', 'Unknown Recipe')
-                        created = metadata.get('created', last_modified.isoformat() if last_modified else datetime.now().isoformat())
-                    else:
-                        content = self.get_recipe(filename, user_id) 
-                        if content and content.startswith('# '):
-                            recipe_name = content.split('\n')[0][2:].strip()
-                        else:
-                            recipe_name = "Unknown Recipe"
-                        created = obj['LastModified'].isoformat()
-
-                    recipes.append({
-                        'filename': filename,
-                        'name': recipe_name,
-                        'created': created
-                    })
-                except Exception as e:
-                    print(f"Failed to process {filename}: {e}")
-                    continue
-        
-            return sorted(recipes, key=lambda x: x['created'], reverse=True)
-        except ClientError:
-            return []
-        
-
-    # In class S3Storage:
-
-    def list_all_recipes_admin(self):
-        """
-        Admin-only function to list all recipes from all users.
-        """
-        try:
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            pages = paginator.paginate(
-                Bucket=self.bucket_name,
-                Prefix="recipes/"
-            )
-            
-            recipes = []
-            # This dict will store counts like {'user_id_1': 10, 'user_id_2': 5}
-            user_recipe_counts = {} 
-
-            for page in pages:
-                for obj in page.get('Contents', []):
-                    key = obj['Key']
-                    # Path is "recipes/USER_ID/FILENAME"
-                    # We must ignore the "folder" itself
-                    if key.endswith('/'):
-                        continue
-
-                    parts = key.split('/')
-                    # Ensure the path is valid (recipes/user_id/filename)
-                    if len(parts) != 3 or not parts[2].startswith('recipe_'):
-                        continue 
-
-                    user_id = parts[1]
-                    filename = parts[2]
-
-                    try:
-                        # Update this user's recipe count
-                        user_recipe_counts[user_id] = user_recipe_counts.get(user_id, 0) + 1
-
-                        # Get metadata (fast)
-                        metadata, last_modified = self.get_recipe_metadata(obj['Key'])
-                        
-                        if metadata and 'recipe-name' in metadata:
-                            recipe_name = metadata.get('recipe-name', 'Unknown Recipe')
-                            created = metadata.get('created', last_modified.isoformat() if last_modified else datetime.now().isoformat())
-                        else:
-                            # Slow fallback for old files (should be rare)
-                            content = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read().decode('utf-8')
-                            if content and content.startswith('# '):
-                                recipe_name = content.split('\n')[0][2:].strip()
-                            else:
-                                recipe_name = "Unknown Recipe"
-                            created = obj['LastModified'].isoformat()
-
-                        recipes.append({
-                            'filename': filename,
-                            'name': recipe_name,
-                            'created': created,
-                            'user_id': user_id  # Add user_id for the admin view
-                        })
-                    except Exception as e:
-                        print(f"Failed to process admin recipe {filename}: {e}")
-                        continue
-            
-            sorted_recipes = sorted(recipes, key=lambda x: x['created'], reverse=True)
-            # Return both the list and the counts dictionary
-            return sorted_recipes, user_recipe_counts
-
-        except ClientError as e:
-            print(f"Admin recipe list failed: {e}")
-            return [], {}
-
-    def delete_recipe(self, filename, user_id):
-        try:
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=f"recipes/{user_id}/{filename}"  # <--- Uses user_id
-            )
-            return True
-        except ClientError:
-            return False
 class RecipeScraper:
     def __init__(self, storage):
         api_key = os.getenv('GROQ_API_KEY')
@@ -260,6 +88,7 @@ class RecipeScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.page_cache = PageCache()
     
     # @app.route('/admin/dashboard')
     # def admin_dashboard():
@@ -418,57 +247,84 @@ class RecipeScraper:
         }
     
     def scrape_url(self, url):
-        if self.is_youtube_url(url):
-            return self.extract_youtube_transcript(url)
-        
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-            
-            structured_recipe = self.extract_structured_data(soup)
-            
-            title = soup.find('title')
-            page_title = title.get_text().strip() if title else ""
-            
-            text_content = soup.get_text()
-            lines = (line.strip() for line in text_content.splitlines())
-            text_content = '\n'.join(line for line in lines if line)
-            
-            recipe_sections = self.extract_recipe_sections(text_content)
-            
-            return {
-                "url": url,
-                "title": page_title,
-                "content": text_content[:15000],
-                "structured_data": structured_recipe,
-                "recipe_sections": recipe_sections,
-                "scraped_at": datetime.now().isoformat()
-            }
-            
+            return self.fetch_page(url)
         except Exception:
             return None
     
-    def extract_structured_data(self, soup):
-        scripts = soup.find_all('script', type='application/ld+json')
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, list):
-                    data = data[0]
-                if data.get('@type') == 'Recipe' or 'Recipe' in str(data.get('@type', '')):
-                    return data
-            except:
-                continue
-        return None
-
+    def fetch_page(self, url):
+        """scrape_url without the safety net: fetch errors propagate, for negative_cache.classify."""
+        if self.is_youtube_url(url):
+            return self.extract_youtube_transcript(url)
+        
+        # Served from the on-disk page cache when fresh or still valid (304)
+        response = self.page_cache.fetch(self.session, url, timeout=10)
+        
+        # The download stopped at a WordPress Recipe Maker id: the recipe
+        # comes as a few KB of JSON, no need for the rest of the page
+        if response.stopped == 'wprm':
+            wprm_recipe = wprm.fetch_recipe(self.session, response.url, wprm.find_recipe_id(response.content))
+            if wprm_recipe:
+                return {
+                    "url": url,
+                    "title": wprm_recipe['name'],
+                    "content": recipe_render.render_markdown(wprm_recipe),
+                    "structured_data": wprm_recipe,
+                    "recipe_sections": {},
+                    "canonical_url": wprm_recipe.get('url'),
+                    "adapter": "wprm_json",
+                    "scraped_at": datetime.now().isoformat()
+                }
+            response = self.page_cache.fetch(self.session, url, timeout=10, early_stop=False)
+        
+        # One lxml pass: structured data is read before any <script> is dropped
+        page = page_extract.extract_page(response.content)
+        # Known sites are read straight from their recipe markup, when the page
+        # is whole and its own structured data doesn't already hold the recipe
+        adapter, adapted_recipe = None, None
+        if response.stopped not in EARLY_STOPS and not recipe_render.is_complete(page['recipe']):
+            adapter, adapted_recipe = site_adapters.extract(url, page['tree'])
+        structured_recipe = adapted_recipe or page['recipe']
+        canonical_url = page['canonical_url']
+        page_title = page['title']
+        # Only the recipe-bearing region, not the story, comments and teasers
+        text_content = main_content.main_text(page['blocks'])
+        
+        recipe_sections = self.extract_recipe_sections(text_content)
+        
+        return {
+            "url": url,
+            "title": page_title,
+            "content": text_content[:15000],
+            "structured_data": structured_recipe,
+            "recipe_sections": recipe_sections,
+            "canonical_url": canonical_url,
+            "adapter": adapter,
+            "scraped_at": datetime.now().isoformat()
+        }
+    
     def parse_with_ai(self, scraped_data):
+        return self.parse_recipe(scraped_data)[0]
+
+    def parse_recipe(self, scraped_data):
+        """
+        parse_with_ai, plus how the answer was produced: (text, 'structured', None)
+        when rendered from structured data, (text, 'llm', None) when the model
+        answered, or (text, 'fallback', error) when the model call failed and
+        the regex fallback_parse stood in.
+        """
         import json
 
+        # A complete schema.org Recipe already holds everything the prompt asks
+        # for, so render it directly instead of calling the model
+        structured = scraped_data.get('structured_data')
+        if recipe_render.is_complete(structured):
+            if scraped_data.get('adapter'):
+                print(f"Rendering recipe with the {scraped_data['adapter']} site adapter, skipping AI")
+            else:
+                print("Rendering recipe from structured data, skipping AI")
+            return recipe_render.render_markdown(structured), 'structured', None
+
         content_text = scraped_data.get('content', '').strip()
 
         # Step 1: Inject pre-extracted sections if available
@@ -546,6 +402,7 @@ class RecipeScraper:
 
         # Step 5: Call AI model
         try:
+            started = time.perf_counter()
             response = self.ai_client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[
@@ -562,12 +419,13 @@ class RecipeScraper:
                 max_tokens=5000,
                 stream=False
             )
+            site_adapters.record_llm_call(time.perf_counter() - started)
             ai_response = response.choices[0].message.content.strip()
-            return ai_response
+            return ai_response, 'llm', None
 
         except Exception as e:
             print("AI parsing failed:", str(e))
-            return self.fallback_parse(scraped_data)   
+            return self.fallback_parse(scraped_data), 'fallback', e   
         
 
     def fallback_parse(self, scraped_data):
@@ -628,35 +486,77 @@ class RecipeScraper:
 # In class RecipeScraper:
     # In class RecipeScraper:
     
-    def scrape_and_save(self, url, user_id):
-        scraped_data = self.scrape_url(url)
-        if not scraped_data or not scraped_data.get('content'):
-            return {"status": "failed", "error": "Failed to scrape URL", "url": url}
+    def scrape_and_save(self, url, user_id, refresh=False):
+        # URLs that failed recently (gone, not a page, no recipe, timing out)
+        # are turned away without another fetch or Groq call
+        failure_key = result_cache.canonicalize_url(url)
+        failure = negative_cache.lookup(failure_key, refresh=refresh)
+        if failure is not None:
+            print("Negative cache hit:", failure_key, failure.failure_class)
+            return {
+                "status": "failed",
+                "error": f"This URL failed recently ({failure.failure_class.replace('_', ' ')}); try again later",
+                "failure_class": failure.failure_class,
+                "retry_after": negative_cache.retry_after(failure),
+                "cached": True,
+                "url": url
+            }
 
-        ai_response = None 
         try:
-            ai_response = self.parse_with_ai(scraped_data)
-            print("AI Response:", repr(ai_response))
+            scraped_data = self.fetch_page(url)
         except Exception as e:
-            print(f"An error occurred during AI parsing: {str(e)}")
-            traceback.print_exc()
-            return {"status": "failed", "error": f"AI parsing failed: {str(e)}", "url": url}
-
-        if not ai_response or ai_response.strip() == "NO_RECIPE_FOUND":
-            return {"status": "failed", "error": "AI failed to extract recipe", "url": url}
-
-        markdown_content = self.create_markdown(ai_response, scraped_data)
-        if not markdown_content or len(markdown_content.strip()) < 10:
-            return {"status": "failed", "error": "Failed to format recipe content", "url": url}
-
-        recipe_name = "Unknown Recipe"
-        first_line = markdown_content.split('\n')[0].strip()
-        if first_line.startswith('# '):
-            recipe_name = first_line[2:].strip()
+            failure_class, status_code = negative_cache.classify(e)
+            if failure_class:
+                negative_cache.record(failure_key, failure_class, error=str(e), status_code=status_code)
+            print(f"Scraping {url} failed: {e}")
+            return {"status": "failed", "error": "Failed to scrape URL", "failure_class": failure_class, "url": url}
+        if not scraped_data or not scraped_data.get('content'):
+            negative_cache.record(failure_key, 'no_content')
+            return {"status": "failed", "error": "Failed to scrape URL", "failure_class": "no_content", "url": url}
+
+        # Same page, same content: reuse the markdown from an earlier extraction
+        canonical_url = result_cache.canonicalize_url(url, scraped_data.get('canonical_url'))
+        digest = result_cache.content_hash(scraped_data)
+        cached = result_cache.lookup(canonical_url, digest, refresh=refresh)
+
+        if cached is not None:
+            print("Extraction cache hit:", canonical_url)
+            markdown_content = cached.markdown
+            recipe_name = cached.recipe_name
+        else:
+            ai_response = None 
+            try:
+                ai_response, parsed_by, llm_error = self.parse_recipe(scraped_data)
+                print("AI Response:", repr(ai_response))
+            except Exception as e:
+                print(f"An error occurred during AI parsing: {str(e)}")
+                traceback.print_exc()
+                return {"status": "failed", "error": f"AI parsing failed: {str(e)}", "url": url}
+
+            if not ai_response or ai_response.strip() == "NO_RECIPE_FOUND":
+                if parsed_by == 'fallback':
+                    # Groq was down or rate limiting us: says nothing about the page
+                    return {"status": "failed", "error": f"AI parsing failed: {llm_error}", "url": url}
+                negative_cache.record(failure_key, 'no_recipe', error="NO_RECIPE_FOUND")
+                return {"status": "failed", "error": "AI failed to extract recipe", "failure_class": "no_recipe", "url": url}
+
+            markdown_content = self.create_markdown(ai_response, scraped_data)
+            if not markdown_content or len(markdown_content.strip()) < 10:
+                return {"status": "failed", "error": "Failed to format recipe content", "url": url}
+
+            recipe_name = "Unknown Recipe"
+            first_line = markdown_content.split('\n')[0].strip()
+            if first_line.startswith('# '):
+                recipe_name = first_line[2:].strip()
+
+            # The regex fallback's guess shouldn't be served to later scrapes of the page
+            if parsed_by != 'fallback':
+                result_cache.store(canonical_url, digest, markdown_content, recipe_name)
 
         domain = urlparse(url).netloc.replace('www.', '').replace('/', '_')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"recipe_{domain}_{timestamp}.md"
+        # Batch jobs can finish several recipes from one site within the same second
+        filename = f"recipe_{domain}_{timestamp}_{uuid.uuid4().hex[:6]}.md"
         print("Saving to S3:", filename, "for user:", user_id)
 
         save_success = self.storage.save_recipe(
@@ -669,19 +569,26 @@ class RecipeScraper:
         if not save_success:
             return {"status": "failed", "error": "Failed to save recipe to S3", "url": url}
 
+        catalog.record_recipe(user_id, filename, recipe_name, source=catalog.source_from_url(url))
+        # The URL works now: drop any failures (live or expired) so the next
+        # blip starts from the base TTL instead of a backed-off one
+        negative_cache.clear(failure_key)
+
         return {
             "status": "success",
             "filename": filename,
             "recipe_name": recipe_name,
             "url": url,
             "content": markdown_content,
+            "cached": cached is not None,
             "created": datetime.now().isoformat()
         }
     
 
 try:
-    storage = S3Storage()
+    storage = create_storage()
     scraper = RecipeScraper(storage)
+    scrape_pool = scrape_jobs.ScrapeWorkerPool(app, scraper)
 except ValueError as e:
     print(f"Configuration error: {e}")
     exit(1)
@@ -1283,6 +1190,10 @@ HTML_TEMPLATE = """
             </div>
         </div>
 
+        <button class="btn btn-secondary" id="loadMoreBtn" onclick="loadMoreRecipes()" style="display: none; margin-top: 1rem; width: 100%;">
+            ⬇️ Load More
+        </button>
+
         <button class="btn btn-secondary" onclick="refreshRecipeList()" style="margin-top: 1rem; width: 100%;">
             📁 Refresh List
         </button>
@@ -1321,20 +1232,24 @@ HTML_TEMPLATE = """
 
     <script>
         let recipes = [];
+        let nextCursor = null;
         let expandedRecipe = null;
         let editingFilename = null;
         let deletingFilename = null;
 
-        async function getRecipeList() {
+        async function getRecipeList(cursor = null) {
             try {
-                const response = await fetch('/api/recipes');
+                const params = new URLSearchParams();
+                if (cursor) params.set('cursor', cursor);
+                const response = await fetch(`/api/recipes?${params}`);
                 return await response.json();
             } catch (error) {
                 console.error('Failed to fetch recipes:', error);
-                return [];
+                return { recipes: [], next_cursor: null };
             }
         }
 
+        // Views go through the app, which answers from its content cache and with 304s
         async function getRecipeContent(filename) {
             try {
                 const response = await fetch(`/api/recipe/${encodeURIComponent(filename)}`);
@@ -1346,6 +1261,26 @@ HTML_TEMPLATE = """
             }
         }
 
+        // /api/scrape queues a job; poll it until a worker has finished it
+        async function waitForScrapeJob(jobId) {
+            let delay = 1000;
+            while (true) {
+                await new Promise(resolve => setTimeout(resolve, delay));
+                const response = await fetch(`/api/jobs/${encodeURIComponent(jobId)}`);
+                const job = await response.json();
+                if (!response.ok) {
+                    throw new Error(job.error || 'Failed to check scrape job');
+                }
+                if (job.status === 'succeeded') {
+                    return job.result;
+                }
+                if (job.status === 'failed') {
+                    throw new Error(job.error || 'Failed to scrape recipe');
+                }
+                delay = Math.min(delay * 1.5, 5000);
+            }
+        }
+
         async function scrapeRecipeFromUrl(url) {
             const response = await fetch('/api/scrape', {
                 method: 'POST',
@@ -1360,7 +1295,8 @@ HTML_TEMPLATE = """
                 throw new Error(error.error || 'Failed to scrape recipe');
             }
             
-            return await response.json();
+            const job = await response.json();
+            return await waitForScrapeJob(job.job_id);
         }
 
         
@@ -1400,12 +1336,53 @@ HTML_TEMPLATE = """
 
         async function loadRecipeList() {
             try {
-                recipes = await getRecipeList();
+                const page = await getRecipeList();
+                recipes = page.recipes || [];
+                nextCursor = page.next_cursor;
                 renderRecipeList();
             } catch (error) {
                 console.error('Failed to load recipes:', error);
             }
         }
+
+        async function loadMoreRecipes() {
+            if (!nextCursor) return;
+            try {
+                const page = await getRecipeList(nextCursor);
+                recipes = recipes.concat(page.recipes || []);
+                nextCursor = page.next_cursor;
+                renderRecipeList();
+            } catch (error) {
+                console.error('Failed to load more recipes:', error);
+            }
+        }
+        // Downloads come straight from storage through a presigned URL. When none can
+        // be issued (pending write, dictionary codec, local disk) the app's copy is saved
+        async function downloadRecipe(filename, event) {
+            event.stopPropagation(); // Prevent toggleRecipe from firing
+
+            try {
+                const response = await fetch(`/api/recipe/${encodeURIComponent(filename)}/url`);
+                if (response.ok) {
+                    window.location.href = (await response.json()).url;
+                    return;
+                }
+            } catch (error) {
+                console.warn('Presigned download unavailable, saving through the app:', error);
+            }
+
+            const content = await getRecipeContent(filename);
+            if (content === null || content === undefined) {
+                alert('Could not download recipe. Try again later.');
+                return;
+            }
+            const link = document.createElement('a');
+            link.href = URL.createObjectURL(new Blob([content], { type: 'text/markdown' }));
+            link.download = filename;
+            link.click();
+            URL.revokeObjectURL(link.href);
+        }
+
         async function shareRecipe(name, url, event) {
             event.stopPropagation(); // Prevent toggleRecipe from firing
 
@@ -1433,14 +1410,18 @@ HTML_TEMPLATE = """
                 alert('Could not share recipe. Try again later.');
             }
         }
-        async function loadRecipes() {
-            const response = await fetch('/api/recipes');
-            const recipes = await response.json();
+        async function loadRecipes(cursor = null) {
+            const page = await getRecipeList(cursor);
+            const recipes = page.recipes || [];
 
             const container = document.getElementById('recipe-list');
-            container.innerHTML = ''; // Clear previous
+            if (!cursor) {
+                container.innerHTML = ''; // Clear previous
+            } else {
+                container.querySelector('.load-more')?.remove();
+            }
 
-            if (recipes.length === 0) {
+            if (!cursor && recipes.length === 0) {
                 container.innerHTML = '<p>No recipes found.</p>';
                 return;
             }
@@ -1456,6 +1437,15 @@ HTML_TEMPLATE = """
                 `;
                 container.appendChild(item);
             });
+
+            // Fetch the next page only when asked for
+            if (page.next_cursor) {
+                const more = document.createElement('button');
+                more.className = 'load-more';
+                more.textContent = 'Load more';
+                more.onclick = () => loadRecipes(page.next_cursor);
+                container.appendChild(more);
+            }
             }
 
             async function viewRecipe(filename) {
@@ -1485,6 +1475,7 @@ HTML_TEMPLATE = """
 
         function renderRecipeList() {
             const listElement = document.getElementById('recipeList');
+            document.getElementById('loadMoreBtn').style.display = nextCursor ? 'block' : 'none';
 
             if (recipes.length === 0) {
                 listElement.innerHTML = `
@@ -1513,6 +1504,9 @@ HTML_TEMPLATE = """
                             <button class="btn btn-small btn-danger" onclick="deleteRecipe('${recipe.filename}', event)" title="Delete Recipe">
                                 🗑️
                             </button>
+                            <button class="btn btn-small btn-secondary" onclick="downloadRecipe('${recipe.filename}', event)" title="Download Recipe">
+                                ⬇️
+                            </button>
                             <button class="btn btn-small btn-outline-primary" 
                                     onclick="shareRecipe('${recipe.name}', '${window.location.origin}/recipe/${recipe.filename}', event)" 
                                     title="Share Recipe">
@@ -1698,9 +1692,6 @@ HTML_TEMPLATE = """
                     body: JSON.stringify({ url: url })
                 });
 
-                clearInterval(progressInterval);
-                progressFill.style.width = '100%';
-
               // --- FIX: Check for login redirect BEFORE trying .json() ---
               const contentType = response.headers.get("content-type");
               if (response.status === 401 || (response.redirected && !contentType?.includes("application/json")) || (!response.ok && !contentType?.includes("application/json"))) {
@@ -1718,8 +1709,12 @@ HTML_TEMPLATE = """
                     throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
                 }
 
-                // If we reach here, it was a successful JSON response
-                const result = await response.json(); 
+                // If we reach here, the job was queued; wait for a worker to finish it
+                const job = await response.json();
+                await waitForScrapeJob(job.job_id);
+
+                clearInterval(progressInterval);
+                progressFill.style.width = '100%';
                 
                 await loadRecipeList();
                 scrapeText.textContent = '✅ Recipe Added!';
@@ -1746,6 +1741,7 @@ HTML_TEMPLATE = """
                  alert('Failed to scrape recipe: ' + error.message);
               }
             } finally {
+                clearInterval(progressInterval);
                 scrapeBtn.disabled = false;
                 setTimeout(() => {
                     progressBar.style.display = 'none';
@@ -1822,6 +1818,29 @@ HTML_TEMPLATE = """
             }
         }
 
+        // Keep the original photo: it goes straight to storage through a presigned POST
+        async function uploadOriginalPhoto(file) {
+            try {
+                const response = await fetch('/api/photos/upload-url', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ content_type: file.type })
+                });
+                if (!response.ok) return null;
+
+                const upload = await response.json();
+                const form = new FormData();
+                Object.entries(upload.fields).forEach(([name, value]) => form.append(name, value));
+                form.append('file', file);
+
+                const result = await fetch(upload.url, { method: 'POST', body: form });
+                return result.ok ? upload.key : null;
+            } catch (error) {
+                console.error('Photo upload failed:', error);
+                return null;
+            }
+        }
+
         async function processOcrRecipe() {
             const text = document.getElementById('ocrText').value.trim();
             if (!text) {
@@ -1853,12 +1872,16 @@ HTML_TEMPLATE = """
             }, 300);
 
             try {
+                // Upload the original first so the saved recipe keeps its key; best effort
+                const photo = document.getElementById('imageInput').files[0];
+                const photoKey = photo ? await uploadOriginalPhoto(photo) : null;
+
                 const response = await fetch('/api/ocr', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
                     },
-                    body: JSON.stringify({ text: text })
+                    body: JSON.stringify({ text: text, photo_key: photoKey })
                 });
                 
                 if (!response.ok) {
@@ -1964,22 +1987,26 @@ def dashboard():
     users = User.query.all() # Get all users from SQL DB
     recipes = []
     user_recipe_counts = {}
+    source_counts = {}
 
     try:
-        # Check the user's role
+        # Listings come from the SQL catalog, not from S3. Only the first
+        # page is rendered; the dashboards page through the rest on demand.
         if role == 'admin':
-            # Admin gets ALL recipes from ALL users in S3
-            recipes, user_recipe_counts = storage.list_all_recipes_admin()
+            # Admin gets ALL recipes from ALL users
+            recipes, _ = catalog.list_all_recipes()
+            user_recipe_counts = catalog.user_recipe_counts()
+            source_counts = catalog.source_counts()
         else:
-            # Regular user gets ONLY their recipes from S3
-            recipes = storage.list_recipes(current_user.id)
+            # Regular user gets ONLY their recipes
+            recipes, _ = catalog.list_user_recipes(current_user.id)
             # For a non-admin, we just build their own count
-            user_recipe_counts[str(current_user.id)] = len(recipes)
+            user_recipe_counts[str(current_user.id)] = catalog.count_recipes(current_user.id)
+            source_counts = catalog.source_counts(current_user.id)
             
-        # Total recipes is the length of the list we just got
-        total_recipes = len(recipes) 
+        total_recipes = sum(user_recipe_counts.values())
         
-        # Add the S3-based recipe count to each user object
+        # Add the recipe count to each user object
         for user in users:
             # Get count from the dict we built, default to 0
             user.recipe_count = user_recipe_counts.get(str(user.id), 0) 
@@ -1987,20 +2014,19 @@ def dashboard():
         # Correctly query the DB for active users
         active_users = User.query.filter_by(is_active=True).count()
         
-        # Calculate average using the S3 counts
-        total_s3_recipes = sum(user_recipe_counts.values())
-        avg_recipes = round(total_s3_recipes / len(users), 2) if users else 0
+        # Calculate average using the catalog counts
+        avg_recipes = round(total_recipes / len(users), 2) if users else 0
+        top_source = next((src for src in source_counts if src), 'N/A')
 
-        # This context now has the correct data from S3
         context = {
             'username': username,
             'total_recipes': total_recipes,
             'active_users': active_users,
             'last_sync_time': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-            'top_source': 'youtube.com', # Placeholder
+            'top_source': top_source,
             'popular_tags': ['Chicken', 'Quick Meals'], # Placeholder
             'avg_recipes': avg_recipes,
-            'recipes': recipes, # This is now the S3 recipe list
+            'recipes': recipes,
             'users': users,
         }
 
@@ -2091,7 +2117,7 @@ def update_role():
 
 @app.route('/api/dashboard-metrics')
 def dashboard_metrics():
-    total_recipes = Recipe.query.count()
+    total_recipes = catalog.count_recipes()
     active_users = User.query.count()
     last_sync_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     return jsonify({
@@ -2102,24 +2128,25 @@ def dashboard_metrics():
 
 @app.route('/api/usage-analytics')
 def usage_analytics():
-    # Most scraped source
-    top_source = db.session.query(Recipe.source).group_by(Recipe.source).order_by(db.func.count().desc()).first()
+    # Per-source totals come from the materialised counters, largest first
+    source_counts = catalog.source_counts()
+    top_source = next((src for src in source_counts if src), None)
 
     # Average recipes per user
     user_count = User.query.count()
-    recipe_count = Recipe.query.count()
+    recipe_count = sum(source_counts.values())
     avg_recipes = round(recipe_count / user_count, 2) if user_count else 0
 
     # Popular tags (placeholder logic)
     popular_tags = ['quick', 'vegan', 'dessert']  # Replace with actual tag aggregation if available
 
     # Breakdown for charting
-    scraped_count = Recipe.query.filter(Recipe.source != None).count()
-    manual_count = Recipe.query.filter(Recipe.source == None).count()
+    manual_count = source_counts.get(None, 0)
+    scraped_count = recipe_count - manual_count
     favorites_count = 10  # Replace with actual logic if you track favorites
 
     return jsonify({
-        'top_source': top_source[0] if top_source else 'N/A',
+        'top_source': top_source or 'N/A',
         'avg_recipes': avg_recipes,
         'popular_tags': popular_tags,
         'scraped_count': scraped_count,
@@ -2132,46 +2159,160 @@ def usage_analytics():
 @app.route('/api/users')
 def get_users():
     users = User.query.all()
+    recipe_counts = catalog.user_recipe_counts()
     return jsonify([
         {
             'id': u.id,
             'username': u.username,
-            'recipe_count': len(u.recipes),
+            'recipe_count': recipe_counts.get(str(u.id), 0),
             'role': u.role 
         } for u in users
     ])
 
 
 
+@app.route('/healthz')
+def healthz():
+    """Liveness: the worker is up. Never touches S3."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: the worker can reach its S3 bucket."""
+    ready, error = storage.check_ready()
+    if not ready:
+        return jsonify({'status': 'unavailable', 'error': error}), 503
+    return jsonify({'status': 'ready'})
+
 @app.route('/')
 def index():
     return render_template_string(HTML_TEMPLATE)
 
+def conditional_json(payload, etag=None, last_modified=None):
+    """
+    JSON response that browsers must revalidate before reuse.
+    Uses the given ETag (e.g. the S3 one) or a strong hash of the body, and
+    answers a matching If-None-Match / If-Modified-Since with an empty 304.
+    """
+    response = jsonify(payload)
+    if etag:
+        response.set_etag(etag.strip('"'))
+    else:
+        response.add_etag()
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def get_page_args():
+    """Read ?limit=&cursor= from the query string. Raises ValueError on bad input."""
+    limit = request.args.get('limit', catalog.DEFAULT_PAGE_SIZE, type=int)
+    cursor = request.args.get('cursor') or None
+    if cursor:
+        catalog.decode_cursor(cursor)
+    return limit, cursor
+
+
 @app.route('/api/recipes')
 @login_required
 def get_recipes():
     """
-    Get list of all markdown recipe files from S3 bucket with metadata.
+    Get one page of the current user's recipes from the SQL catalog (newest first).
+    Pass the returned next_cursor back as ?cursor= to fetch the following page.
     """
     try:
-        # YOUR S3Storage.list_recipes() function ALREADY does all the work:
-        # 1. Lists S3 objects
-        # 2. Gets each file's content
-        # 3. Parses the recipe name
-        # 4. Gets the creation date
-        # 5. Returns a sorted list of dictionaries
-        #
-        # Your original /api/recipes route was re-doing this work and failing.
-        # The correct code is to just call your function and return its result.
-        
-        recipe_list = storage.list_recipes(current_user.id)  # <--- Pass user_id
-        return jsonify(recipe_list)
+        limit, cursor = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        recipe_list, next_cursor = catalog.list_user_recipes(current_user.id, limit, cursor)
+        return conditional_json({'recipes': recipe_list, 'next_cursor': next_cursor})
 
     except Exception as e:
         print(f"Recipe listing failed: {str(e)}")
         traceback.print_exc() # Add this for better debugging
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/recipes')
+@login_required
+def get_all_recipes_admin():
+    """
+    Admin-only: one page of every user's recipes, same ?limit=&cursor= contract as /api/recipes.
+    """
+    if current_user.role.strip().lower() != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    try:
+        limit, cursor = get_page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        recipe_list, next_cursor = catalog.list_all_recipes(limit, cursor)
+        return conditional_json({'recipes': recipe_list, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        print(f"Admin recipe listing failed: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/cache-stats')
+@login_required
+def get_cache_stats():
+    """Admin-only: hit/miss/eviction counters for the in-process caches and site adapters of this worker."""
+    if current_user.role.strip().lower() != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    stats = storage.cache_stats()
+    stats['page_cache'] = scraper.page_cache.stats()
+    stats['extraction_cache'] = result_cache.stats()
+    stats['site_adapters'] = site_adapters.stats()
+    stats['negative_cache'] = negative_cache.stats()
+    return jsonify(stats)
+
+@app.route('/api/admin/failing-urls')
+@login_required
+def get_failing_urls():
+    """Admin-only: URLs the negative cache is turning away, most requested first."""
+    if current_user.role.strip().lower() != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    failures = negative_cache.hot_failures(limit)
+    return jsonify({'failures': [negative_cache.serialize(f) for f in failures]})
+
+def export_response(prefix, download_name, arcname=None):
+    """Streamed archive download for ?format=zip|tar.gz (zip by default)."""
+    fmt = request.args.get('format', 'zip')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return Response(
+        storage.export_recipes(prefix, fmt, arcname),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{download_name}_{timestamp}.{fmt}"'}
+    )
+
+@app.route('/api/recipes/export')
+@login_required
+def export_recipes():
+    """Download the current user's whole cookbook as one archive."""
+    user_prefix = f"recipes/{current_user.id}/"
+    return export_response(user_prefix, 'cookbook', arcname=lambda key: key[len(user_prefix):])
+
+@app.route('/api/admin/recipes/export')
+@login_required
+def export_all_recipes_admin():
+    """Admin-only: every user's recipes, laid out as recipes/{user_id}/{filename}."""
+    if current_user.role.strip().lower() != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    return export_response("recipes/", 'all_cookbooks')
+
 @app.route('/api/recipe/save', methods=['POST'])
 @login_required
 def save_recipe():
@@ -2195,6 +2336,8 @@ def save_recipe():
         # Call save_recipe ONCE with all correct arguments
         if not storage.save_recipe(filename, content, recipe_name, user_id):
             return jsonify({'error': 'Failed to save recipe to S3'}), 500
+
+        catalog.record_recipe(user_id, filename, recipe_name)
         
         return jsonify({
             'success': True,
@@ -2212,18 +2355,72 @@ def get_recipe_content(filename):
         if not filename.startswith('recipe_') or not filename.endswith('.md'):
             return jsonify({'error': 'Invalid filename'}), 400
         
-        # Call get_recipe ONCE with the user_id
-        content = storage.get_recipe(filename, current_user.id) 
+        # Call fetch_recipe ONCE with the user_id
+        content, etag, last_modified = storage.fetch_recipe(filename, current_user.id)
         
         if content is None:
             return jsonify({'error': 'Recipe not found'}), 404
         
-        return jsonify({'content': content})
+        return conditional_json({'content': content}, etag=etag, last_modified=last_modified)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/recipe/<filename>/url')
+@login_required
+def get_recipe_url(filename):
+    """
+    Short-lived presigned URL so the browser can download the recipe straight from storage.
+    Used for downloads only: views go through /api/recipe/<filename>, which the
+    content cache and ETags make cheaper than a HEAD plus a GET from storage.
+    """
+    try:
+        if not filename.startswith('recipe_') or not filename.endswith('.md'):
+            return jsonify({'error': 'Invalid filename'}), 400
+
+        expires_in = int(os.getenv('PRESIGNED_URL_TTL', 300))
+        url = storage.presign_recipe_url(filename, current_user.id, expires_in)
+        if url is None:
+            return jsonify({'error': 'Recipe not found or not directly downloadable'}), 404
+
+        return jsonify({'url': url, 'expires_in': expires_in})
+
+    except NotImplementedError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/photos/upload-url', methods=['POST'])
+@login_required
+def get_photo_upload_url():
+    """
+    Presigned POST (default) or PUT target for uploading an original recipe photo
+    directly to storage under recipes/{user_id}/, bypassing the web workers.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        content_type = data.get('content_type', '').strip().lower()
+        method = data.get('method', 'post').strip().lower()
+
+        if content_type not in PHOTO_EXTENSIONS:
+            return jsonify({'error': f"Unsupported image type, use one of: {', '.join(PHOTO_EXTENSIONS)}"}), 400
+        if method not in ('post', 'put'):
+            return jsonify({'error': "method must be 'post' or 'put'"}), 400
+
+        expires_in = int(os.getenv('PRESIGNED_URL_TTL', 300))
+        max_bytes = int(os.getenv('PHOTO_UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+        upload = storage.presign_photo_upload(current_user.id, content_type, expires_in, max_bytes, method)
+        upload['expires_in'] = expires_in
+        return jsonify(upload)
+
+    except NotImplementedError as e:
+        return jsonify({'error': str(e)}), 501
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/recipe/<filename>', methods=['DELETE'])
 @login_required  # <--- FIX: Add login_required
 def delete_recipe(filename):
@@ -2233,6 +2430,8 @@ def delete_recipe(filename):
         
         if not storage.delete_recipe(filename, current_user.id): # <--- Pass user_id
             return jsonify({'error': 'Failed to delete recipe from S3'}), 500
+
+        catalog.forget_recipe(current_user.id, filename)
         
         return jsonify({
             'success': True,
@@ -2243,6 +2442,56 @@ def delete_recipe(filename):
         return jsonify({'error': str(e)}), 500
     
 
+@app.route('/api/recipes', methods=['DELETE'])
+@login_required
+def delete_recipes():
+    """
+    Bulk delete: body is {"filenames": [...]}. Only filenames in the caller's
+    catalog are sent to storage, under the caller's own prefix, so a user can
+    only ever delete their own recipes; S3 would report unknown keys as
+    deleted. Responds with a per-filename status.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        filenames = data.get('filenames')
+        if not isinstance(filenames, list) or not filenames:
+            return jsonify({'error': 'filenames must be a non-empty list'}), 400
+
+        results = {}
+        valid = []
+        for filename in dict.fromkeys(str(f).strip() for f in filenames):
+            if not filename.startswith('recipe_') or not filename.endswith('.md') or '/' in filename:
+                results[filename] = {'status': 'failed', 'error': 'Invalid filename'}
+            else:
+                valid.append(filename)
+
+        owned = catalog.owned_filenames(current_user.id, valid)
+        for filename in valid:
+            if filename not in owned:
+                results[filename] = {'status': 'failed', 'error': 'Recipe not found'}
+        valid = [filename for filename in valid if filename in owned]
+
+        deleted = []
+        for filename, error in storage.delete_recipes(valid, current_user.id).items():
+            if error:
+                results[filename] = {'status': 'failed', 'error': error}
+            else:
+                results[filename] = {'status': 'deleted'}
+                deleted.append(filename)
+
+        catalog.forget_recipes(current_user.id, deleted)
+
+        return jsonify({
+            'success': len(deleted) == len(results),
+            'deleted': len(deleted),
+            'results': results
+        })
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+    
+
 @app.route('/api/ocr', methods=['POST'])
 @login_required
 def process_ocr_text():
@@ -2250,9 +2499,13 @@ def process_ocr_text():
         data = request.get_json()
         user_id = current_user.id
         ocr_text = data.get('text', '').strip()
+        # Key of the original photo, uploaded by the browser via /api/photos/upload-url
+        photo_key = (data.get('photo_key') or '').strip() or None
 
         if not ocr_text:
             return jsonify({'error': 'OCR text is required'}), 400
+        if photo_key and not is_photo_key(photo_key, user_id):
+            return jsonify({'error': 'Invalid photo key'}), 400
 
         # ... (all your OCR parsing logic remains the same) ...
         print("OCR Extracted Text:", ocr_text)
@@ -2292,10 +2545,13 @@ def process_ocr_text():
         if not storage.save_recipe(filename, markdown_content, recipe_name, user_id):
             return jsonify({'error': 'Failed to save recipe to S3'}), 500
 
+        catalog.record_recipe(user_id, filename, recipe_name, photo_key=photo_key)
+
         return jsonify({
             'success': True,
             'filename': filename,
             'recipe_name': recipe_name,
+            'photo_key': photo_key,
             'created': datetime.now().isoformat()
         })
     
@@ -2318,19 +2574,102 @@ def scrape_recipe():
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
-        # --- LOGGED-IN USER ---
-        # User is logged in, so we scrape AND save to their account
-        result = scraper.scrape_and_save(url, current_user.id)
+        # The scrape itself runs on the worker pool; the client polls /api/jobs/<id>
+        job = scrape_jobs.enqueue(current_user.id, url, refresh=bool(data.get('refresh')))
+        scrape_pool.notify()
+        return jsonify(scrape_jobs.serialize_job(job)), 202
 
-        if not result or result.get("status") == "failed":
-            return jsonify({'error': result.get("error", "Unknown scraping error.")}), 400
-        
-        # Return success response (it's saved)
-        return jsonify(result), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+
+@app.route('/api/scrape/batch', methods=['POST'])
+@login_required
+def scrape_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        raw_urls = data.get('urls')
+        if not isinstance(raw_urls, list) or not raw_urls:
+            return jsonify({'error': 'urls must be a non-empty list'}), 400
+
+        urls = []
+        for url in raw_urls:
+            url = str(url).strip()
+            if not url:
+                continue
+            if not url.startswith(('http://', 'https://')):
+                url = 'https://' + url
+            if url not in urls:
+                urls.append(url)
+        if not urls:
+            return jsonify({'error': 'urls must be a non-empty list'}), 400
+        if len(urls) > scrape_jobs.MAX_BATCH_URLS:
+            return jsonify({'error': f'At most {scrape_jobs.MAX_BATCH_URLS} URLs per batch'}), 400
+
+        batch = scrape_jobs.enqueue_batch(current_user.id, urls, refresh=bool(data.get('refresh')))
+        scrape_pool.notify()
+        return jsonify(scrape_jobs.serialize_batch(batch)), 202
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': f'Internal error: {str(e)}'}), 500
 
+@app.route('/api/scrape/batch/<batch_id>')
+@login_required
+def get_scrape_batch(batch_id):
+    batch = scrape_jobs.get_batch(batch_id)
+    is_admin = current_user.role.strip().lower() == 'admin'
+    if batch is None or (batch.user_id != current_user.id and not is_admin):
+        return jsonify({'error': 'Batch not found'}), 404
+    payload = scrape_jobs.serialize_batch(batch)
+    if not payload['done']:
+        scrape_pool.ensure_started()
+    return jsonify(payload)
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def get_scrape_job(job_id):
+    job = scrape_jobs.get_job(job_id)
+    is_admin = current_user.role.strip().lower() == 'admin'
+    if job is None or (job.user_id != current_user.id and not is_admin):
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status in ('queued', 'running'):
+        # Picks up jobs left queued by a restart in this process
+        scrape_pool.ensure_started()
+    return jsonify(scrape_jobs.serialize_job(job))
+
+@app.cli.command('sync-catalog')
+@click.option('--prune', is_flag=True, help='Also drop catalog rows whose S3 object no longer exists.')
+def sync_catalog_command(prune):
+    """Backfill the Recipe table from the objects already in S3."""
+    added, removed = catalog.sync_from_storage(storage, prune=prune)
+    print(f"Catalog sync complete: {added} added, {removed} removed")
+
+
+@app.cli.command('scrape-worker')
+@click.option('--workers', type=int, default=None, help='Worker threads (defaults to SCRAPE_WORKERS).')
+def scrape_worker_command(workers):
+    """Process queued scrape jobs in the foreground until interrupted."""
+    pool = scrape_jobs.ScrapeWorkerPool(app, scraper, workers=workers)
+    if pool.workers <= 0:
+        pool.workers = scrape_jobs.DEFAULT_WORKERS
+    pool.ensure_started()
+    print(f"Scrape worker running with {pool.workers} threads")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.cli.command('reconcile-counters')
+@click.option('--prune', is_flag=True, help='Also drop catalog rows whose S3 object no longer exists.')
+def reconcile_counters_command(prune):
+    """Resync the catalog from S3, then rebuild the per-user/per-source recipe counters."""
+    added, removed = catalog.sync_from_storage(storage, prune=prune)
+    drifted = catalog.reconcile_counters()
+    print(f"Counters reconciled: {added} catalog rows added, {removed} removed, {drifted} counters corrected")
+
+
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5000)
@@ -0,0 +1,154 @@
+"""
+Extraction result cache.
+
+The Groq call is the slowest and most expensive step of a scrape, and many
+users save the same recipes. scrape_and_save therefore keys the finished
+markdown by the page's canonical URL plus a hash of the scraped content:
+when both match a previous extraction the LLM is skipped and only the
+user's own copy is written. A changed page hashes differently and is
+extracted again.
+
+Rows live in the ExtractionCache table so every worker process shares them.
+Pass refresh=True (the `refresh` flag on /api/scrape) to ignore and replace
+the cached result.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from models import db, ExtractionCache
+
+
+# Query parameters that only identify a campaign or click, never the page
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'share', 'si', 'feature', '_ga', '_gl',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+YOUTUBE_ID_PATTERNS = [
+    re.compile(r'(?:^|\.)youtube(?:-nocookie)?\.com/(?:embed|shorts|live|v)/([A-Za-z0-9_-]{11})'),
+    re.compile(r'(?:^|\.)youtube\.com/.*[?&]v=([A-Za-z0-9_-]{11})'),
+    re.compile(r'^youtu\.be/([A-Za-z0-9_-]{11})'),
+]
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'bypasses': 0, 'errors': 0}
+
+
+def _bare_host(netloc):
+    host = netloc.lower().split('@')[-1].split(':')[0]
+    for prefix in ('www.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+def youtube_video_id(url):
+    parts = urlsplit(url.strip())
+    target = _bare_host(parts.netloc) + parts.path + ('?' + parts.query if parts.query else '')
+    for pattern in YOUTUBE_ID_PATTERNS:
+        match = pattern.search(target)
+        if match:
+            return match.group(1)
+    return None
+
+
+def canonicalize_url(url, canonical_hint=None):
+    """
+    Collapse the different spellings of one page to a single key.
+    `canonical_hint` is the page's <link rel="canonical"> href; it is only
+    trusted when it points at the same site.
+    """
+    video_id = youtube_video_id(url)
+    if video_id:
+        return f"https://youtube.com/watch?v={video_id}"
+
+    if canonical_hint:
+        hint = urljoin(url, canonical_hint.strip())
+        if hint.startswith(('http://', 'https://')) and _bare_host(urlsplit(hint).netloc) == _bare_host(urlsplit(url).netloc):
+            url = hint
+
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', _bare_host(parts.netloc), path, urlencode(query), ''))
+
+
+def content_hash(scraped_data):
+    """Hash of the scraped text and structured data the LLM would be given."""
+    payload = json.dumps(
+        [scraped_data.get('content') or '', scraped_data.get('structured_data')],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _key(canonical_url, digest):
+    return hashlib.sha256(f"{canonical_url}\n{digest}".encode('utf-8')).hexdigest()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def lookup(canonical_url, digest, refresh=False):
+    """Return the cached ExtractionCache row, or None. Cache errors count as a miss."""
+    if refresh:
+        _count('bypasses')
+        return None
+    try:
+        entry = db.session.get(ExtractionCache, _key(canonical_url, digest))
+        if entry is None:
+            _count('misses')
+            return None
+        ExtractionCache.query.filter_by(key=entry.key).update({
+            ExtractionCache.hit_count: ExtractionCache.hit_count + 1,
+            ExtractionCache.last_hit_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.session.commit()
+        _count('hits')
+        return entry
+    except Exception as e:
+        db.session.rollback()
+        print(f"Extraction cache lookup failed: {e}")
+        _count('errors')
+        return None
+
+
+def store(canonical_url, digest, markdown, recipe_name):
+    try:
+        key = _key(canonical_url, digest)
+        entry = db.session.get(ExtractionCache, key)
+        if entry is None:
+            entry = ExtractionCache(key=key, canonical_url=canonical_url[:2048], content_hash=digest)
+            db.session.add(entry)
+        entry.markdown = markdown
+        entry.recipe_name = (recipe_name or 'Unknown Recipe')[:150]
+        entry.created_at = datetime.utcnow()
+        db.session.commit()
+        _count('stores')
+    except Exception as e:
+        db.session.rollback()
+        print(f"Extraction cache store failed: {e}")
+        _count('errors')
+
+
+def stats():
+    """Counters for this process plus the size of the shared table."""
+    with _stats_lock:
+        result = dict(_stats)
+    try:
+        result['entries'] = ExtractionCache.query.count()
+    except Exception:
+        db.session.rollback()
+        result['entries'] = None
+    return result
@@ -0,0 +1,306 @@
+"""
+Asynchronous scrape jobs.
+
+POST /api/scrape only inserts a ScrapeJob row and returns its id; the slow
+part (page fetch, yt-dlp, the Groq call, the storage write) runs on a
+ScrapeWorkerPool so web workers are never held for the length of an LLM
+call. Clients poll GET /api/jobs/<id>.
+
+The queue is the SQL database the app already uses, so any number of
+processes can share it. Workers claim a job with a compare-and-set UPDATE
+and hold it under a lease, which a heartbeat keeps extending while the
+scrape runs; a job whose worker died is picked up again once the lease
+runs out, up to SCRAPE_JOB_MAX_ATTEMPTS times.
+
+SCRAPE_WORKERS sets the number of worker threads started in each web
+process (default 4), which is also that process's cap on concurrent
+scrapes. Set it to 0 and run `flask scrape-worker` to keep scraping out of
+the web processes entirely.
+
+POST /api/scrape/batch queues one job per URL under a ScrapeBatch. Single
+scrapes are claimed ahead of batch items so a large import doesn't hold
+up someone waiting on the page. No more than SCRAPE_PER_DOMAIN_LIMIT jobs
+(default 2) run against the same site at once, and SCRAPE_MAX_RUNNING
+(default 0, no limit) caps running jobs overall. Both are counted from the
+job table, so they hold across every process sharing the queue.
+"""
+
+import json
+import os
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from catalog import source_from_url
+from models import db, ScrapeBatch, ScrapeJob
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_LEASE = 300       # seconds; comfortably above a slow yt-dlp + LLM round trip
+DEFAULT_MAX_ATTEMPTS = 2
+DEFAULT_PER_DOMAIN_LIMIT = 2
+DEFAULT_MAX_RUNNING = 0   # 0: no cap beyond the worker threads
+MAX_BATCH_URLS = 300
+
+
+def enqueue(user_id, url, refresh=False):
+    job = ScrapeJob(id=uuid.uuid4().hex, user_id=user_id, url=url, domain=source_from_url(url),
+                    refresh=refresh, status='queued')
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def enqueue_batch(user_id, urls, refresh=False):
+    """Queue one job per URL under a new ScrapeBatch, in a single transaction."""
+    batch = ScrapeBatch(id=uuid.uuid4().hex, user_id=user_id)
+    db.session.add(batch)
+    db.session.add_all([
+        ScrapeJob(id=uuid.uuid4().hex, user_id=user_id, batch_id=batch.id, url=url, domain=source_from_url(url),
+                  refresh=refresh, status='queued')
+        for url in urls
+    ])
+    db.session.commit()
+    return batch
+
+
+def get_job(job_id):
+    return db.session.get(ScrapeJob, job_id)
+
+
+def get_batch(batch_id):
+    return db.session.get(ScrapeBatch, batch_id)
+
+
+def serialize_batch(batch):
+    jobs = ScrapeJob.query.filter_by(batch_id=batch.id).order_by(ScrapeJob.created_at, ScrapeJob.id).all()
+    counts = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    return {
+        'batch_id': batch.id,
+        'created': batch.created_at.isoformat() if batch.created_at else None,
+        'total': len(jobs),
+        'counts': counts,
+        'done': all(job.status in ('succeeded', 'failed') for job in jobs),
+        'jobs': [serialize_job(job) for job in jobs],
+    }
+
+
+def serialize_job(job):
+    item = {
+        'job_id': job.id,
+        'url': job.url,
+        'status': job.status,
+        'created': job.created_at.isoformat() if job.created_at else None,
+        'finished': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.result:
+        item['result'] = json.loads(job.result)
+    if job.error:
+        item['error'] = job.error
+    return item
+
+
+def _claimable(now):
+    return db.or_(
+        ScrapeJob.status == 'queued',
+        db.and_(ScrapeJob.status == 'running', ScrapeJob.claimed_until < now),
+    )
+
+
+def _running(now):
+    """Jobs some worker, in any process, is still working on."""
+    return ScrapeJob.query.filter(ScrapeJob.status == 'running', ScrapeJob.claimed_until >= now)
+
+
+def _release(job_id, worker_id):
+    """Hand a job just claimed by `worker_id` back to the queue without counting the attempt."""
+    ScrapeJob.query.filter_by(id=job_id, claimed_by=worker_id).update({
+        ScrapeJob.status: 'queued',
+        ScrapeJob.claimed_by: None,
+        ScrapeJob.claimed_until: None,
+        ScrapeJob.started_at: None,
+        ScrapeJob.attempts: ScrapeJob.attempts - 1,
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def fail_abandoned(max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Give up on jobs whose worker keeps dying on them. Returns the number failed."""
+    now = datetime.utcnow()
+    failed = ScrapeJob.query.filter(
+        ScrapeJob.status == 'running',
+        ScrapeJob.claimed_until < now,
+        ScrapeJob.attempts >= max_attempts,
+    ).update({
+        ScrapeJob.status: 'failed',
+        ScrapeJob.error: 'Worker stopped while processing this job',
+        ScrapeJob.finished_at: now,
+        ScrapeJob.claimed_by: None,
+        ScrapeJob.claimed_until: None,
+    }, synchronize_session=False)
+    db.session.commit()
+    return failed
+
+
+def claim_next(worker_id, lease=DEFAULT_LEASE, per_domain_limit=None, max_running=None):
+    """
+    Claim the next runnable job for `worker_id`, or return None.
+    Jobs for a domain that already has `per_domain_limit` running jobs are
+    passed over, and nothing is claimed while `max_running` jobs run. The
+    UPDATE repeats the claimable condition, so when two workers race for
+    the same row only one of them sees rowcount == 1.
+    """
+    now = datetime.utcnow()
+    if max_running and _running(now).count() >= max_running:
+        return None
+    query = db.session.query(ScrapeJob.id, ScrapeJob.domain).filter(_claimable(now))
+    if per_domain_limit:
+        busy = [
+            domain for domain, count in
+            _running(now).with_entities(ScrapeJob.domain, db.func.count()).group_by(ScrapeJob.domain)
+            if domain is not None and count >= per_domain_limit
+        ]
+        if busy:
+            query = query.filter(db.or_(ScrapeJob.domain.is_(None), ScrapeJob.domain.notin_(busy)))
+    rows = query.order_by(ScrapeJob.batch_id.isnot(None), ScrapeJob.created_at).limit(5).all()
+    for row in rows:
+        claimed = ScrapeJob.query.filter(ScrapeJob.id == row.id, _claimable(now)).update({
+            ScrapeJob.status: 'running',
+            ScrapeJob.claimed_by: worker_id,
+            ScrapeJob.claimed_until: now + timedelta(seconds=lease),
+            ScrapeJob.started_at: now,
+            ScrapeJob.attempts: ScrapeJob.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+        # Workers elsewhere may have taken the same slots since the counts
+        # above. Recount with this claim committed: whoever recounts last
+        # sees every claim, so at most the limit survive (ties all back off).
+        if max_running and _running(now).count() > max_running:
+            _release(row.id, worker_id)
+            return None
+        if per_domain_limit and row.domain is not None and \
+                _running(now).filter(ScrapeJob.domain == row.domain).count() > per_domain_limit:
+            _release(row.id, worker_id)
+            continue
+        return get_job(row.id)
+    return None
+
+
+def extend_lease(job_id, worker_id, lease=DEFAULT_LEASE):
+    """Push out the lease on a job `worker_id` still holds. Returns False once the claim is lost."""
+    extended = ScrapeJob.query.filter_by(id=job_id, claimed_by=worker_id, status='running').update({
+        ScrapeJob.claimed_until: datetime.utcnow() + timedelta(seconds=lease),
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(extended)
+
+
+def finish(job, worker_id, result):
+    """Store the outcome of scrape_and_save, unless the lease was lost to another worker."""
+    stored = {k: v for k, v in (result or {}).items() if k != 'content'}
+    succeeded = bool(result) and result.get('status') == 'success'
+    ScrapeJob.query.filter_by(id=job.id, claimed_by=worker_id).update({
+        ScrapeJob.status: 'succeeded' if succeeded else 'failed',
+        ScrapeJob.result: json.dumps(stored) if succeeded else None,
+        ScrapeJob.error: None if succeeded else (stored.get('error') or 'Unknown scraping error.'),
+        ScrapeJob.finished_at: datetime.utcnow(),
+        ScrapeJob.claimed_by: None,
+        ScrapeJob.claimed_until: None,
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+class ScrapeWorkerPool:
+    def __init__(self, app, scraper, workers=None, lease=None, max_attempts=None,
+                 per_domain_limit=None, max_running=None, poll_interval=2.0):
+        self.app = app
+        self.scraper = scraper
+        self.workers = int(os.getenv('SCRAPE_WORKERS', DEFAULT_WORKERS)) if workers is None else workers
+        self.lease = lease or int(os.getenv('SCRAPE_JOB_LEASE', DEFAULT_LEASE))
+        self.max_attempts = max_attempts or int(os.getenv('SCRAPE_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.per_domain_limit = per_domain_limit or int(os.getenv('SCRAPE_PER_DOMAIN_LIMIT', DEFAULT_PER_DOMAIN_LIMIT))
+        self.max_running = int(os.getenv('SCRAPE_MAX_RUNNING', DEFAULT_MAX_RUNNING)) if max_running is None else max_running
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the worker threads once per process; forked workers start their own."""
+        if self.workers <= 0 or (self._pid == os.getpid() and all(t.is_alive() for t in self._threads)):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and all(t.is_alive() for t in self._threads):
+                return
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._threads = []
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'scrape-worker-{len(self._threads)}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle workers after a job has been enqueued."""
+        self.ensure_started()
+        self._wake.set()
+
+    def _run(self):
+        worker_id = f"{os.getpid()}-{threading.get_ident()}"
+        while True:
+            try:
+                worked = self.run_once(worker_id)
+            except Exception as e:
+                print(f"Scrape worker cycle failed: {e}")
+                traceback.print_exc()
+                worked = False
+            if not worked:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _heartbeat(self, job_id, worker_id, done):
+        """
+        Keep extending the lease while a slow yt-dlp + LLM scrape runs, so
+        the job isn't taken for abandoned and run (and saved) a second time.
+        """
+        while not done.wait(self.lease / 3):
+            try:
+                with self.app.app_context():
+                    if not extend_lease(job_id, worker_id, self.lease):
+                        print(f"Scrape job {job_id} lease lost by {worker_id}")
+                        return
+            except Exception as e:
+                print(f"Scrape job {job_id} heartbeat failed: {e}")
+
+    def run_once(self, worker_id='manual'):
+        """Claim and process a single job. Returns False when the queue was empty."""
+        with self.app.app_context():
+            fail_abandoned(self.max_attempts)
+            job = claim_next(worker_id, self.lease, self.per_domain_limit, self.max_running)
+            if job is None:
+                return False
+            print(f"Scrape job {job.id} claimed by {worker_id}: {job.url}")
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job.id, worker_id, done),
+                                         name=f'scrape-heartbeat-{job.id[:8]}', daemon=True)
+            heartbeat.start()
+            try:
+                result = self.scraper.scrape_and_save(job.url, job.user_id, refresh=job.refresh)
+            except Exception as e:
+                traceback.print_exc()
+                db.session.rollback()
+                result = {"status": "failed", "error": f"Internal error: {str(e)}", "url": job.url}
+            finally:
+                done.set()
+                heartbeat.join()
+            finish(job, worker_id, result)
+            # A slot for this domain just opened up for any idle thread
+            self._wake.set()
+            return True
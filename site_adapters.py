@@ -0,0 +1,204 @@
+"""
+Per-site recipe adapters.
+
+Most scrapes come from a handful of domains, and those sites lay out every
+recipe with the same markup. An adapter reads the title, ingredients and
+method straight out of that markup and returns a schema.org-style Recipe
+dict, which parse_with_ai renders with recipe_render instead of calling
+Groq. Pages an adapter cannot read (a redesign, a non-recipe page) fall
+through to the generic JSON-LD / LLM path, so an adapter can only save
+work, never lose a recipe.
+
+Adapters are plain functions taking the page's lxml tree, registered for
+one or more domains with @register; subdomains match too. The scrapers
+only run them on whole pages whose own structured data lacks a complete
+recipe: a download cut short after its ld+json has nothing for an adapter
+to read, and would only count as a miss.
+
+stats() reports per-adapter attempts, hits and time spent, and the mean
+latency of the LLM calls made in this process, from which the time the
+adapter hits saved is estimated.
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+import recipe_render
+
+
+ADAPTERS = {}  # bare domain -> (name, function)
+
+_stats_lock = threading.Lock()
+_stats = {}  # adapter name -> counters
+_llm = {'calls': 0, 'seconds': 0.0}
+
+
+def register(*domains):
+    def decorator(fn):
+        for domain in domains:
+            ADAPTERS[domain] = (fn.__name__, fn)
+        return fn
+    return decorator
+
+
+def adapter_for(url):
+    """(name, function) of the adapter registered for `url`'s domain, or None."""
+    host = (urlsplit(url).hostname or '').lower()
+    while host:
+        if host in ADAPTERS:
+            return ADAPTERS[host]
+        host = host.partition('.')[2]
+    return None
+
+
+def record(name, outcome, seconds):
+    """Count one attempt by adapter `name`; outcome is 'hits', 'misses' or 'errors'."""
+    with _stats_lock:
+        counters = _stats.setdefault(name, {'attempts': 0, 'hits': 0, 'misses': 0, 'errors': 0, 'seconds': 0.0})
+        counters['attempts'] += 1
+        counters[outcome] += 1
+        counters['seconds'] += seconds
+
+
+def extract(url, tree):
+    """
+    Run the adapter for `url` over `tree`. Returns (adapter name, Recipe dict)
+    when it produced a complete recipe, otherwise (None, None).
+    """
+    found = adapter_for(url)
+    if found is None or tree is None:
+        return None, None
+    name, adapter = found
+
+    started = time.perf_counter()
+    try:
+        recipe = adapter(tree)
+    except Exception as e:
+        print(f"Site adapter {name} failed on {url}: {e}")
+        record(name, 'errors', time.perf_counter() - started)
+        return None, None
+    elapsed = time.perf_counter() - started
+
+    if not recipe_render.is_complete(recipe):
+        record(name, 'misses', elapsed)
+        return None, None
+    record(name, 'hits', elapsed)
+    return name, recipe
+
+
+def record_llm_call(seconds):
+    """Called by parse_with_ai after each model call, to price an adapter hit."""
+    with _stats_lock:
+        _llm['calls'] += 1
+        _llm['seconds'] += seconds
+
+
+def stats():
+    with _stats_lock:
+        llm_mean = _llm['seconds'] / _llm['calls'] if _llm['calls'] else None
+        adapters = {}
+        for name, counters in _stats.items():
+            adapters[name] = {
+                'attempts': counters['attempts'],
+                'hits': counters['hits'],
+                'misses': counters['misses'],
+                'errors': counters['errors'],
+                'hit_rate': round(counters['hits'] / counters['attempts'], 3),
+                'mean_ms': round(counters['seconds'] / counters['attempts'] * 1000, 2),
+                'estimated_saved_seconds': (
+                    round(counters['hits'] * llm_mean - counters['seconds'], 1) if llm_mean is not None else None
+                ),
+            }
+        return {
+            'domains': sorted(ADAPTERS),
+            'adapters': adapters,
+            'llm_calls': _llm['calls'],
+            'llm_mean_seconds': round(llm_mean, 2) if llm_mean is not None else None,
+        }
+
+
+def _class_xpath(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _find_all(node, class_name, tag='*'):
+    return node.xpath(f".//{tag}[{_class_xpath(class_name)}]")
+
+
+def _find(node, class_name, tag='*'):
+    found = _find_all(node, class_name, tag)
+    return found[0] if found else None
+
+
+def _text(node):
+    return recipe_render.clean_text(node.text_content()) if node is not None else ''
+
+
+def _recipe(name, ingredients, sections):
+    """Build the Recipe dict recipe_render expects; `sections` is [(section name or '', [steps])]."""
+    instructions = []
+    for section_name, steps in sections:
+        items = [{'@type': 'HowToStep', 'text': step} for step in steps if step]
+        if section_name:
+            instructions.append({'@type': 'HowToSection', 'name': section_name, 'itemListElement': items})
+        else:
+            instructions.extend(items)
+    return {
+        '@type': 'Recipe',
+        'name': name,
+        'recipeIngredient': [ingredient for ingredient in ingredients if ingredient],
+        'recipeInstructions': instructions,
+    }
+
+
+@register('bbcgoodfood.com')
+def bbcgoodfood(tree):
+    heading = tree.xpath('//h1')
+    ingredients_section = _find(tree, 'recipe__ingredients', 'section')
+    method_section = _find(tree, 'recipe__method-steps', 'section')
+    if not heading or ingredients_section is None or method_section is None:
+        return None
+
+    ingredients = [_text(item) for item in ingredients_section.xpath('.//li')]
+    steps = []
+    for item in method_section.xpath('.//li'):
+        # Each step is a "step 1" label followed by the text in .editor-content
+        body = _find(item, 'editor-content')
+        steps.append(_text(body if body is not None else item))
+    return _recipe(_text(heading[0]), ingredients, [('', steps)])
+
+
+def _wprm_ingredient(item):
+    parts = [
+        _text(_find(item, f'wprm-recipe-ingredient-{part}'))
+        for part in ('amount', 'unit', 'name')
+    ]
+    line = ' '.join(part for part in parts if part)
+    if not line:
+        return _text(item).lstrip('▢ ')
+    notes = _text(_find(item, 'wprm-recipe-ingredient-notes'))
+    return f"{line}, {notes}" if notes else line
+
+
+def _group_name(group):
+    return _text(_find(group, 'wprm-recipe-group-name')).rstrip(':')
+
+
+@register('recipetineats.com', 'tamingtwins.com')
+def wprm(tree):
+    """WordPress Recipe Maker's recipe card, as used by recipetineats and tamingtwins."""
+    card = _find(tree, 'wprm-recipe-container')
+    if card is None:
+        card = _find(tree, 'wprm-recipe')
+    if card is None:
+        return None
+
+    ingredients = [_wprm_ingredient(item) for item in _find_all(card, 'wprm-recipe-ingredient', 'li')]
+    sections = []
+    for group in _find_all(card, 'wprm-recipe-instruction-group'):
+        steps = [_text(step) for step in _find_all(group, 'wprm-recipe-instruction-text')]
+        sections.append((_group_name(group), steps))
+    if not sections:
+        sections = [('', [_text(step) for step in _find_all(card, 'wprm-recipe-instruction-text')])]
+    return _recipe(_text(_find(card, 'wprm-recipe-name')), ingredients, sections)
@@ -1,2 +1,3 @@
 #!/bin/bash
+flask --app recipe_scraper_s3 db upgrade
 gunicorn launch_scraper:app
@@ -0,0 +1,704 @@
+"""
+Recipe storage backends.
+
+Every backend stores markdown recipes addressed by the key
+"recipes/{user_id}/{filename}" and implements the StorageBackend API,
+so the web app runs unchanged on S3 or on local disk.
+
+STORAGE_BACKEND selects the backend: 's3' (default) or 'local'.
+Setting WRITE_BEHIND_JOURNAL wraps it in write_behind.WriteBehindStorage.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+
+from content_cache import ContentCache
+from recipe_codec import RecipeCodec
+from recipe_export import prefetch, stream_archive
+
+
+# Photo types accepted for presigned uploads, mapped to the stored file extension
+PHOTO_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/heic': '.heic',
+    'image/gif': '.gif',
+}
+
+
+def is_photo_key(key, user_id):
+    """True if `key` has the shape presign_photo_upload gives a photo of `user_id`."""
+    prefix = f"recipes/{user_id}/photo_"
+    if not isinstance(key, str) or not key.startswith(prefix) or '/' in key[len(prefix):]:
+        return False
+    return os.path.splitext(key)[1] in PHOTO_EXTENSIONS.values()
+
+
+class StorageBackend:
+    """
+    Interface shared by all recipe stores.
+    Subclasses implement the storage primitives; the bulk helpers below are built on them.
+    """
+
+    # How many reads bulk operations (export) may keep in flight
+    listing_concurrency = 1
+
+    def save_recipe(self, filename, content, recipe_name, user_id):
+        """Write a recipe. Returns True on success, False on failure."""
+        raise NotImplementedError
+
+    def fetch_recipe(self, filename, user_id):
+        """Return (content, etag, last_modified), or (None, None, None) if it can't be read."""
+        raise NotImplementedError
+
+    def delete_recipe(self, filename, user_id):
+        """Delete a recipe. Returns True on success, False on failure."""
+        raise NotImplementedError
+
+    def list_recipes(self, user_id):
+        """Every recipe of one user as [{'filename', 'name', 'created'}], newest first."""
+        raise NotImplementedError
+
+    def list_all_recipes_admin(self):
+        """Every recipe of every user, plus {user_id: count}."""
+        raise NotImplementedError
+
+    def iter_recipe_keys(self, prefix="recipes/"):
+        """Lazily yield every recipe key under a prefix."""
+        raise NotImplementedError
+
+    def read_recipe_object(self, key):
+        """Read and decode one recipe by key, bypassing any cache."""
+        raise NotImplementedError
+
+    def check_ready(self):
+        """Readiness probe: returns (True, None) if the store is usable, else (False, reason)."""
+        raise NotImplementedError
+
+    def presign_recipe_url(self, filename, user_id, expires_in):
+        """
+        Short-lived URL the browser can GET the recipe markdown from directly,
+        or None if the recipe is missing or not stored in a browser-readable form.
+        """
+        raise NotImplementedError("This storage backend cannot issue presigned URLs")
+
+    def presign_photo_upload(self, user_id, content_type, expires_in, max_bytes, method='post'):
+        """
+        Short-lived upload target for an original recipe photo under recipes/{user_id}/.
+        Returns {'key', 'url', 'method', 'fields' (POST only)}.
+        """
+        raise NotImplementedError("This storage backend cannot issue presigned URLs")
+
+    def get_recipe(self, filename, user_id):
+        return self.fetch_recipe(filename, user_id)[0]
+
+    def delete_recipes(self, filenames, user_id):
+        """
+        Bulk delete. Returns {filename: None} for deleted keys and {filename: error message} for failures.
+        """
+        return {filename: None if self.delete_recipe(filename, user_id) else 'Delete failed'
+                for filename in filenames}
+
+    def export_recipes(self, prefix, fmt='zip', arcname=None):
+        """
+        Stream an archive of every recipe under `prefix`.
+        Objects are fetched concurrently a bounded window ahead of the archive writer.
+        """
+        arcname = arcname or (lambda key: key)
+        files = ((arcname(key), content) for key, content in
+                 prefetch(self.iter_recipe_keys(prefix), self.read_recipe_object, self.listing_concurrency))
+        return stream_archive(files, fmt)
+
+    def cache_stats(self):
+        """Counters for any in-process caches the backend keeps."""
+        return {}
+
+
+class S3Storage(StorageBackend):
+    def __init__(self):
+        self.bucket_name = os.getenv('AWS_S3_BUCKET')
+        if not self.bucket_name:
+            raise ValueError("AWS_S3_BUCKET environment variable is required")
+        
+        # Each request thread may fan out up to listing_concurrency S3 calls at once,
+        # so size the connection pool for all of them instead of botocore's default 10
+        web_threads = max(1, int(os.getenv('WEB_THREADS', 1)))
+        self.listing_concurrency = max(1, int(os.getenv('S3_LISTING_CONCURRENCY', 10)))
+        max_pool = int(os.getenv('S3_MAX_POOL_CONNECTIONS', web_threads * self.listing_concurrency))
+        # Threads beyond the client's connection pool would only queue on it
+        self.listing_concurrency = min(self.listing_concurrency, max_pool)
+
+        self.client_config = Config(
+            max_pool_connections=max_pool,
+            connect_timeout=float(os.getenv('S3_CONNECT_TIMEOUT', 3)),
+            read_timeout=float(os.getenv('S3_READ_TIMEOUT', 10)),
+            retries={'mode': 'adaptive', 'total_max_attempts': int(os.getenv('S3_MAX_ATTEMPTS', 5))}
+        )
+
+        # The client is built lazily, once per process: nothing touches the network at import
+        # time, and a gunicorn worker forked from a preloaded master never reuses its sockets
+        self._client = None
+        self._client_pid = None
+        self._client_lock = threading.Lock()
+
+        # Opt-in compression for new objects; reads decode whatever codec an object was written with
+        self.codec = RecipeCodec(os.getenv('RECIPE_STORAGE_CODEC', 'plain'))
+
+        # Recipes rarely change, so keep recent bodies and revalidate them by ETag
+        self.content_cache = ContentCache(int(os.getenv('RECIPE_CACHE_MAX_BYTES', 16 * 1024 * 1024)))
+    
+    @property
+    def s3_client(self):
+        if self._client is None or self._client_pid != os.getpid():
+            with self._client_lock:
+                if self._client is None or self._client_pid != os.getpid():
+                    # A private session keeps client creation thread-safe
+                    session = boto3.session.Session()
+                    self._client = session.client(
+                        's3',
+                        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                        region_name=os.getenv('AWS_REGION', 'us-east-1'),
+                        # Optional: point at an S3-compatible stand-in (MinIO, moto server)
+                        endpoint_url=os.getenv('AWS_S3_ENDPOINT_URL') or None,
+                        config=self.client_config
+                    )
+                    self._client_pid = os.getpid()
+        return self._client
+
+    def check_ready(self):
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            return True, None
+        except (NoCredentialsError, ClientError, BotoCoreError) as e:
+            return False, str(e)
+
+# In class S3Storage:
+    def save_recipe(self, filename, content, recipe_name, user_id):
+        self.content_cache.invalidate(f"recipes/{user_id}/{filename}")
+        body, codec_metadata = self.codec.encode(content)
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=f"recipes/{user_id}/{filename}",  # <--- Uses user_id
+                Body=body,
+                ContentType='text/markdown',
+                Metadata={
+                    'created': datetime.now().isoformat(),
+                    'type': 'recipe',
+                    'recipe-name': recipe_name,
+                    **codec_metadata
+                }
+            )
+            return True
+        except ClientError:
+            return False
+        
+        
+    def fetch_recipe(self, filename, user_id):
+        """
+        Return (content, etag, last_modified) for a recipe, or (None, None, None) if it can't be read.
+        Served from the content cache when S3 confirms the cached ETag is still current.
+        """
+        key = f"recipes/{user_id}/{filename}"  # <--- Uses user_id
+        cached = self.content_cache.get(key)
+        request_args = {'Bucket': self.bucket_name, 'Key': key}
+        if cached:
+            # Unchanged objects come back as a bodiless 304
+            request_args['IfNoneMatch'] = cached[1]
+
+        try:
+            response = self.s3_client.get_object(**request_args)
+        except ClientError as e:
+            if cached and e.response.get('Error', {}).get('Code') in ('304', 'NotModified'):
+                self.content_cache.record_hit()
+                return cached
+            self.content_cache.invalidate(key)
+            return None, None, None
+
+        self.content_cache.record_miss()
+        content = self.codec.decode(response['Body'].read(), response.get('Metadata'))
+        etag, last_modified = response.get('ETag'), response.get('LastModified')
+        self.content_cache.put(key, content, etag, last_modified)
+        return content, etag, last_modified
+        
+    def get_recipe_metadata(self, key):
+        """
+        Helper function to get just the metadata and last-modified time of an S3 object.
+        This uses a fast HEAD request instead of downloading the whole file.
+        """
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket_name,
+                Key=key
+            )
+            # S3 metadata keys are auto-lowercased, so 'recipe-name' is correct
+            return response.get('Metadata', {}), response.get('LastModified')
+        except ClientError:
+            return None, None
+    
+    def describe_recipe(self, key, last_modified=None):
+        """
+        Resolve (recipe_name, created) for one object.
+        Uses a HEAD request; objects saved before the 'recipe-name' metadata
+        existed fall back to downloading the body and reading the title line.
+        """
+        metadata, head_modified = self.get_recipe_metadata(key)
+        last_modified = last_modified or head_modified
+
+        if metadata and 'recipe-name' in metadata:
+            recipe_name = metadata.get('recipe-name', 'Unknown Recipe')
+            created = metadata.get('created', last_modified.isoformat() if last_modified else datetime.now().isoformat())
+        else:
+            # Slow fallback for old files (should be rare)
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            content = self.codec.decode(response['Body'].read(), response.get('Metadata'))
+            if content and content.startswith('# '):
+                recipe_name = content.split('\n')[0][2:].strip()
+            else:
+                recipe_name = "Unknown Recipe"
+            created = last_modified.isoformat() if last_modified else datetime.now().isoformat()
+
+        return recipe_name, created
+
+    def describe_recipes(self, objects):
+        """
+        Run describe_recipe over a batch of list_objects_v2 entries on a bounded thread pool.
+        Results come back in the same order as `objects`; a key that fails yields None
+        instead of failing the whole batch.
+        """
+        if not objects:
+            return []
+
+        workers = min(self.listing_concurrency, len(objects))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.describe_recipe, obj['Key'], obj.get('LastModified')) for obj in objects]
+
+            results = []
+            for obj, future in zip(objects, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Failed to process {obj['Key']}: {e}")
+                    results.append(None)
+            return results
+
+    def presign_recipe_url(self, filename, user_id, expires_in):
+        key = f"recipes/{user_id}/{filename}"
+        metadata, _ = self.get_recipe_metadata(key)
+        if metadata is None:
+            return None
+
+        params = {
+            'Bucket': self.bucket_name,
+            'Key': key,
+            'ResponseContentType': 'text/markdown; charset=utf-8',
+            'ResponseContentDisposition': 'attachment; filename="{}"'.format(filename.replace('"', ''))
+        }
+        codec = metadata.get('codec', 'plain')
+        if codec == 'gzip':
+            # Browsers inflate gzip transparently
+            params['ResponseContentEncoding'] = 'gzip'
+        elif codec != 'plain':
+            # Dictionary-compressed bodies can only be decoded server-side
+            return None
+        return self.s3_client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+    def presign_photo_upload(self, user_id, content_type, expires_in, max_bytes, method='post'):
+        extension = PHOTO_EXTENSIONS[content_type]
+        key = f"recipes/{user_id}/photo_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}{extension}"
+
+        if method == 'put':
+            # A presigned PUT can't cap the upload size; POST policies can
+            url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': self.bucket_name, 'Key': key, 'ContentType': content_type},
+                ExpiresIn=expires_in
+            )
+            return {'key': key, 'url': url, 'method': 'PUT', 'headers': {'Content-Type': content_type}}
+
+        post = self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_bytes]
+            ],
+            ExpiresIn=expires_in
+        )
+        return {'key': key, 'url': post['url'], 'method': 'POST', 'fields': post['fields']}
+
+    def cache_stats(self):
+        return {'recipe_content': self.content_cache.stats()}
+# In class S3Storage:
+    def list_recipes(self, user_id):
+        try:
+            # list_objects_v2 returns at most 1000 keys per call, so walk every page
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
+                Bucket=self.bucket_name,
+                Prefix=f"recipes/{user_id}/recipe_"  # <--- Uses user_id
+            )
+            
+            recipes = []
+            for page in pages:
+                objects = [obj for obj in page.get('Contents', []) if obj['Key'].endswith('.md')]
+
+                # HEAD requests for the whole page run concurrently
+                for obj, described in zip(objects, self.describe_recipes(objects)):
+                    if described is None:
+                        continue
+                    recipe_name, created = described
+                    recipes.append({
+                        'filename': obj['Key'].replace(f'recipes/{user_id}/', ''),
+                        'name': recipe_name,
+                        'created': created
+                    })
+        
+            return sorted(recipes, key=lambda x: x['created'], reverse=True)
+        except ClientError:
+            return []
+        
+
+    # In class S3Storage:
+
+    def list_all_recipes_admin(self):
+        """
+        Admin-only function to list all recipes from all users.
+        """
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
+                Bucket=self.bucket_name,
+                Prefix="recipes/"
+            )
+            
+            recipes = []
+            # This dict will store counts like {'user_id_1': 10, 'user_id_2': 5}
+            user_recipe_counts = {} 
+
+            for page in pages:
+                objects = []
+                for obj in page.get('Contents', []):
+                    key = obj['Key']
+                    # Path is "recipes/USER_ID/FILENAME"
+                    # We must ignore the "folder" itself
+                    if key.endswith('/'):
+                        continue
+
+                    parts = key.split('/')
+                    # Ensure the path is valid (recipes/user_id/filename)
+                    if len(parts) != 3 or not parts[2].startswith('recipe_'):
+                        continue 
+
+                    # Update this user's recipe count
+                    user_recipe_counts[parts[1]] = user_recipe_counts.get(parts[1], 0) + 1
+                    objects.append(obj)
+
+                # HEAD requests for the whole page run concurrently
+                for obj, described in zip(objects, self.describe_recipes(objects)):
+                    if described is None:
+                        continue
+                    _, user_id, filename = obj['Key'].split('/')
+                    recipe_name, created = described
+                    recipes.append({
+                        'filename': filename,
+                        'name': recipe_name,
+                        'created': created,
+                        'user_id': user_id  # Add user_id for the admin view
+                    })
+            
+            sorted_recipes = sorted(recipes, key=lambda x: x['created'], reverse=True)
+            # Return both the list and the counts dictionary
+            return sorted_recipes, user_recipe_counts
+
+        except ClientError as e:
+            print(f"Admin recipe list failed: {e}")
+            return [], {}
+
+    def delete_recipe(self, filename, user_id):
+        self.content_cache.invalidate(f"recipes/{user_id}/{filename}")
+        try:
+            self.s3_client.delete_object(
+                Bucket=self.bucket_name,
+                Key=f"recipes/{user_id}/{filename}"  # <--- Uses user_id
+            )
+            return True
+        except ClientError:
+            return False
+
+    def iter_recipe_keys(self, prefix="recipes/"):
+        """Lazily yield every recipe object key under a prefix, one list_objects_v2 page at a time."""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if key.rsplit('/', 1)[-1].startswith('recipe_') and key.endswith('.md'):
+                    yield key
+
+    def read_recipe_object(self, key):
+        """Download and decode one object by key, bypassing the content cache (used for bulk reads)."""
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        return self.codec.decode(response['Body'].read(), response.get('Metadata'))
+
+    def delete_recipes(self, filenames, user_id):
+        """
+        Bulk delete with delete_objects, up to 1000 keys per call.
+        Returns {filename: None} for deleted keys and {filename: error message} for failures.
+        """
+        results = {}
+        for start in range(0, len(filenames), 1000):
+            chunk = filenames[start:start + 1000]
+            for filename in chunk:
+                self.content_cache.invalidate(f"recipes/{user_id}/{filename}")
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={
+                        'Objects': [{'Key': f"recipes/{user_id}/{filename}"} for filename in chunk],
+                        'Quiet': True  # Only failures are reported back
+                    }
+                )
+            except ClientError as e:
+                results.update({filename: str(e) for filename in chunk})
+                continue
+
+            errors = {err['Key']: err.get('Message', err.get('Code', 'Delete failed'))
+                      for err in response.get('Errors', [])}
+            for filename in chunk:
+                results[filename] = errors.get(f"recipes/{user_id}/{filename}")
+        return results
+
+
+class LocalStorage(StorageBackend):
+    """
+    Recipes on local disk, for single-node deployments and offline load tests.
+
+    Layout is {root}/{shard}/{user_id}/{filename}, where the shard is two hex
+    digits of a hash of the user id so no single directory grows with the user
+    count. Metadata lives in a JSON sidecar next to each recipe and is kept in an
+    in-memory index, refreshed whenever a file's mtime changes (so writes from
+    other workers are picked up). Every file is written to a temp file and
+    renamed into place, so readers never see a partial write.
+    """
+
+    listing_concurrency = 4
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or os.getenv('LOCAL_STORAGE_DIR', os.path.join('instance', 'recipes')))
+        os.makedirs(self.root, exist_ok=True)
+
+        # Opt-in compression for new objects; reads decode whatever codec an object was written with
+        self.codec = RecipeCodec(os.getenv('RECIPE_STORAGE_CODEC', 'plain'))
+
+        self._index = {}  # key -> (mtime_ns, metadata)
+        self._index_lock = threading.Lock()
+
+    @staticmethod
+    def _shard(user_id):
+        return hashlib.md5(str(user_id).encode('utf-8')).hexdigest()[:2]
+
+    def _path(self, user_id, filename):
+        user_id, filename = str(user_id), str(filename)
+        for part in (user_id, filename):
+            if not part or part in ('.', '..') or '/' in part or os.sep in part:
+                raise ValueError(f"Invalid recipe path component: {part!r}")
+        return os.path.join(self.root, self._shard(user_id), user_id, filename)
+
+    def _key_path(self, key):
+        parts = key.split('/')
+        if len(parts) != 3 or parts[0] != 'recipes':
+            raise ValueError(f"Invalid recipe key: {key!r}")
+        return self._path(parts[1], parts[2])
+
+    @staticmethod
+    def _meta_path(path):
+        return path + '.meta.json'
+
+    @staticmethod
+    def _write_atomic(path, data):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _metadata(self, key, path, stat=None):
+        """Metadata for a stored recipe, from the index unless the file changed since it was indexed."""
+        stat = stat or os.stat(path)
+        with self._index_lock:
+            entry = self._index.get(key)
+        if entry and entry[0] == stat.st_mtime_ns:
+            return entry[1]
+
+        try:
+            with open(self._meta_path(path), 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = {}
+        with self._index_lock:
+            self._index[key] = (stat.st_mtime_ns, metadata)
+        return metadata
+
+    def save_recipe(self, filename, content, recipe_name, user_id):
+        try:
+            path = self._path(user_id, filename)
+            body, codec_metadata = self.codec.encode(content)
+            metadata = {
+                'created': datetime.now().isoformat(),
+                'type': 'recipe',
+                'recipe-name': recipe_name,
+                'etag': hashlib.md5(body).hexdigest(),
+                **codec_metadata
+            }
+            # Sidecar first, so a reader that sees the new body also sees its metadata
+            self._write_atomic(self._meta_path(path), json.dumps(metadata).encode('utf-8'))
+            self._write_atomic(path, body)
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Local save failed for {filename}: {e}")
+            return False
+
+    def fetch_recipe(self, filename, user_id):
+        try:
+            path = self._path(user_id, filename)
+            with open(path, 'rb') as f:
+                body = f.read()
+                stat = os.fstat(f.fileno())
+            metadata = self._metadata(f"recipes/{user_id}/{filename}", path, stat)
+            content = self.codec.decode(body, metadata)
+        except (OSError, ValueError):
+            return None, None, None
+
+        etag = metadata.get('etag') or hashlib.md5(body).hexdigest()
+        last_modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        return content, f'"{etag}"', last_modified
+
+    def _describe(self, key, path):
+        stat = os.stat(path)
+        metadata = self._metadata(key, path, stat)
+        recipe_name = metadata.get('recipe-name')
+        if not recipe_name:
+            content = self.read_recipe_object(key)
+            recipe_name = content.split('\n')[0][2:].strip() if content.startswith('# ') else "Unknown Recipe"
+        created = metadata.get('created') or datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat()
+        return recipe_name, created
+
+    def _user_dirs(self):
+        """Yield (user_id, directory) for every user that has stored recipes."""
+        for shard in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for user_id in sorted(os.listdir(shard_dir)):
+                user_dir = os.path.join(shard_dir, user_id)
+                if os.path.isdir(user_dir):
+                    yield user_id, user_dir
+
+    @staticmethod
+    def _recipe_files(directory):
+        try:
+            return sorted(name for name in os.listdir(directory)
+                          if name.startswith('recipe_') and name.endswith('.md'))
+        except FileNotFoundError:
+            return []
+
+    def list_recipes(self, user_id):
+        directory = os.path.dirname(self._path(user_id, 'recipe_.md'))
+        recipes = []
+        for filename in self._recipe_files(directory):
+            try:
+                recipe_name, created = self._describe(f"recipes/{user_id}/{filename}", os.path.join(directory, filename))
+            except (OSError, ValueError) as e:
+                print(f"Failed to process {filename}: {e}")
+                continue
+            recipes.append({'filename': filename, 'name': recipe_name, 'created': created})
+        return sorted(recipes, key=lambda x: x['created'], reverse=True)
+
+    def list_all_recipes_admin(self):
+        recipes = []
+        user_recipe_counts = {}
+        for user_id, directory in self._user_dirs():
+            for filename in self._recipe_files(directory):
+                user_recipe_counts[user_id] = user_recipe_counts.get(user_id, 0) + 1
+                try:
+                    recipe_name, created = self._describe(f"recipes/{user_id}/{filename}", os.path.join(directory, filename))
+                except (OSError, ValueError) as e:
+                    print(f"Failed to process admin recipe {filename}: {e}")
+                    continue
+                recipes.append({'filename': filename, 'name': recipe_name, 'created': created, 'user_id': user_id})
+        return sorted(recipes, key=lambda x: x['created'], reverse=True), user_recipe_counts
+
+    def delete_recipe(self, filename, user_id):
+        try:
+            path = self._path(user_id, filename)
+            for target in (path, self._meta_path(path)):
+                try:
+                    os.remove(target)
+                except FileNotFoundError:
+                    pass
+        except (OSError, ValueError):
+            return False
+        with self._index_lock:
+            self._index.pop(f"recipes/{user_id}/{filename}", None)
+        return True
+
+    def iter_recipe_keys(self, prefix="recipes/"):
+        for user_id, directory in self._user_dirs():
+            user_prefix = f"recipes/{user_id}/"
+            if not (user_prefix.startswith(prefix) or prefix.startswith(user_prefix)):
+                continue
+            for filename in self._recipe_files(directory):
+                key = user_prefix + filename
+                if key.startswith(prefix):
+                    yield key
+
+    def read_recipe_object(self, key):
+        path = self._key_path(key)
+        with open(path, 'rb') as f:
+            body = f.read()
+        return self.codec.decode(body, self._metadata(key, path))
+
+    def check_ready(self):
+        if os.path.isdir(self.root) and os.access(self.root, os.W_OK):
+            return True, None
+        return False, f"Storage directory {self.root} is not writable"
+
+
+def create_storage():
+    backend = os.getenv('STORAGE_BACKEND', 's3').strip().lower()
+    if backend == 's3':
+        storage = S3Storage()
+    elif backend == 'local':
+        storage = LocalStorage()
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected 's3' or 'local'")
+
+    journal_path = os.getenv('WRITE_BEHIND_JOURNAL')
+    if journal_path:
+        # Imported here because write_behind builds on this module
+        from write_behind import WriteBehindStorage
+        storage = WriteBehindStorage(storage, journal_path)
+    return storage
@@ -0,0 +1,200 @@
+"""
+schema.org structured data: JSON-LD, microdata and RDFa.
+
+page_extract hands the parsed tree to json_ld_blocks(), microdata() and
+rdfa(), and best_recipe() picks the Recipe to render from all three.
+
+JSON-LD in the wild is often not quite JSON. loads() tries the fast path
+first (orjson when installed, otherwise json with control characters
+allowed) and only then repairs what sites commonly get wrong: HTML comment
+and CDATA wrappers, an HTML-escaped block, trailing commas, \\' escapes
+and several objects or stray semicolons in one <script>.
+
+Recipes are searched for through lists, Yoast-style @graph documents and
+mainEntity / mainEntityOfPage. Microdata and RDFa items are gathered into
+the same JSON-LD-like dicts, so recipe_render handles every source alike.
+
+bench_structured_data.py measures how often a Recipe is found over the
+fixtures in fixtures/structured_data.
+"""
+
+import html
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # Optional: only makes JSON-LD decoding faster
+    orjson = None
+
+import recipe_render
+
+
+_WRAPPER_RE = re.compile(r'^\s*(?://\s*)?(?:<!--|<!\[CDATA\[)|(?://\s*)?(?:-->|\]\]>)\s*$')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_decoder = json.JSONDecoder(strict=False)
+
+
+def _fast_loads(raw):
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return _decoder.decode(raw)
+
+
+def _repair(raw):
+    raw = raw.lstrip('\ufeff').strip()
+    raw = _WRAPPER_RE.sub('', raw).strip()
+    if raw.startswith('{&quot;') or raw.startswith('[{&quot;'):
+        raw = html.unescape(raw)
+    raw = raw.replace("\\'", "'")
+    return _TRAILING_COMMA_RE.sub(r'\1', raw)
+
+
+def loads(raw):
+    """
+    Decode one ld+json block. Returns a list of the JSON values found in it
+    (usually one), empty when nothing could be recovered.
+    """
+    try:
+        return [_fast_loads(raw)]
+    except ValueError:
+        pass
+
+    raw = _repair(raw)
+    values, pos = [], 0
+    while pos < len(raw):
+        # Skip separators between concatenated objects
+        while pos < len(raw) and raw[pos] in ' \t\r\n;,':
+            pos += 1
+        if pos >= len(raw):
+            break
+        try:
+            value, pos = _decoder.raw_decode(raw, pos)
+        except ValueError:
+            break
+        values.append(value)
+    return values
+
+
+def json_ld_blocks(tree):
+    blocks = []
+    for script in tree.xpath('//script[@type]'):
+        if script.get('type', '').split(';')[0].strip().lower() != 'application/ld+json':
+            continue
+        raw = (script.text or '').strip()
+        if raw:
+            blocks.extend(loads(raw))
+    return blocks
+
+
+def _types(node):
+    node_type = node.get('@type', '') if isinstance(node, dict) else ''
+    return node_type if isinstance(node_type, list) else [node_type]
+
+
+def iter_recipes(blocks):
+    """Every schema.org Recipe in a list of JSON-LD blocks, looking inside @graph and mainEntity."""
+    stack = list(reversed(blocks))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if 'Recipe' in _types(node):
+                yield node
+                continue
+            for key in ('@graph', 'mainEntity', 'mainEntityOfPage'):
+                child = node.get(key)
+                if isinstance(child, (list, dict)):
+                    stack.append(child)
+
+
+def find_recipe(blocks):
+    """The first schema.org Recipe in a list of JSON-LD blocks, or None."""
+    return next(iter_recipes(blocks), None)
+
+
+def best_recipe(*sources):
+    """The first complete Recipe across `sources` (lists of blocks), else the first Recipe at all."""
+    first = None
+    for blocks in sources:
+        for recipe in iter_recipes(blocks):
+            if recipe_render.is_complete(recipe):
+                return recipe
+            if first is None:
+                first = recipe
+    return first
+
+
+# How each attribute syntax marks items, their types and their properties
+_MICRODATA = {'scope': 'itemscope', 'type': 'itemtype', 'prop': 'itemprop'}
+_RDFA = {'scope': 'typeof', 'type': 'typeof', 'prop': 'property'}
+
+
+def _local_name(name):
+    """'http://schema.org/Recipe' and 'schema:Recipe' both become 'Recipe'."""
+    return name.rstrip('/').rsplit('/', 1)[-1].rsplit(':', 1)[-1]
+
+
+def _property_value(element):
+    tag = element.tag if isinstance(element.tag, str) else ''
+    if element.get('content') is not None:
+        return element.get('content').strip()
+    if tag in ('a', 'link'):
+        return element.get('href')
+    if tag in ('img', 'audio', 'video', 'source'):
+        return element.get('src')
+    if tag == 'time' and element.get('datetime'):
+        return element.get('datetime')
+    return ' '.join(element.text_content().split())
+
+
+def _item(scope, syntax):
+    """Collect properties that belong to `scope` (not to a nested item) into a JSON-LD-like dict."""
+    item = {}
+    types = [_local_name(name) for name in scope.get(syntax['type'], '').split()]
+    if types:
+        item['@type'] = types[0] if len(types) == 1 else types
+    for element in scope.iterdescendants():
+        names = element.get(syntax['prop'])
+        if not names:
+            continue
+        owner = element.getparent()
+        while owner is not None and owner is not scope and owner.get(syntax['scope']) is None:
+            owner = owner.getparent()
+        if owner is not scope:
+            continue
+        value = _item(element, syntax) if element.get(syntax['scope']) is not None else _property_value(element)
+        for name in (_local_name(name) for name in names.split()):
+            if name in item:
+                if not isinstance(item[name], list):
+                    item[name] = [item[name]]
+                item[name].append(value)
+            else:
+                item[name] = value
+    # Older markup uses "ingredients" rather than "recipeIngredient"
+    if 'recipeIngredient' not in item and 'ingredients' in item:
+        item['recipeIngredient'] = item.pop('ingredients')
+    for key in ('recipeIngredient', 'recipeInstructions'):
+        if isinstance(item.get(key), str):
+            item[key] = [item[key]]
+    return item
+
+
+def _items(tree, syntax):
+    scope_attr = syntax['scope']
+    return [
+        _item(scope, syntax) for scope in tree.xpath(f"//*[@{scope_attr} and @{syntax['type']}]")
+        if not any(ancestor.get(scope_attr) is not None for ancestor in scope.iterancestors())
+    ]
+
+
+def microdata(tree):
+    return _items(tree, _MICRODATA)
+
+
+def rdfa(tree):
+    return _items(tree, _RDFA)
@@ -0,0 +1,129 @@
+"""
+WordPress Recipe Maker (WPRM) fast path.
+
+Many recipe blogs (recipetineats, tamingtwins and thousands of others) use
+the WPRM plugin. Its markup carries the recipe's post id, in the "Jump to
+Recipe" link near the top of the page and on the recipe card itself, and
+WordPress serves that recipe as a few KB of JSON at
+/wp-json/wp/v2/wprm_recipe/<id>.
+
+page_fetch stops the page download as soon as the id has been seen, and
+scrape_url fetches the JSON instead of the rest of a multi-megabyte page.
+to_recipe() maps it to the schema.org-style dict recipe_render turns into
+markdown, so neither lxml nor the LLM is needed. When the endpoint is
+disabled or returns something incomplete, scrape_url downloads the whole
+page and carries on as usual.
+"""
+
+import re
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import recipe_render
+import site_adapters
+
+
+API_PATH = '/wp-json/wp/v2/wprm_recipe/{id}'
+MAX_JSON_BYTES = 512 * 1024
+
+_CONTAINER_RE = re.compile(rb'wprm-recipe-container-(\d+)')
+_JUMP_RE = re.compile(rb'<a\b[^>]*\bwprm-recipe-jump\b[^>]*>', re.IGNORECASE)
+_DATA_RECIPE_RE = re.compile(rb'\bdata-recipe(?:-id)?=["\']?(\d+)')
+
+
+def find_recipe_id(content, start=0):
+    """The WPRM recipe id in `content` (bytes) at or after `start`, or None."""
+    match = _CONTAINER_RE.search(content, start)
+    jump = _JUMP_RE.search(content, start)
+    if jump and (match is None or jump.start() < match.start()):
+        data = _DATA_RECIPE_RE.search(jump.group())
+        if data:
+            return int(data.group(1))
+    return int(match.group(1)) if match else None
+
+
+def api_url(page_url, recipe_id):
+    parts = urlsplit(page_url)
+    return urlunsplit((parts.scheme, parts.netloc, API_PATH.format(id=recipe_id), '', ''))
+
+
+def _text(value):
+    return recipe_render.clean_text(value) if isinstance(value, (str, int, float)) else ''
+
+
+def _ingredient(item):
+    line = ' '.join(part for part in (_text(item.get(key)) for key in ('amount', 'unit', 'name')) if part)
+    notes = _text(item.get('notes'))
+    return f"{line}, {notes}" if line and notes else line
+
+
+def _groups(items, key):
+    """
+    WPRM stores ingredients and instructions as groups ({name, <key>: [...]}),
+    or flattened with {"type": "group"} rows between the items.
+    """
+    if all(isinstance(item, dict) and key in item for item in items):
+        return [(_text(group.get('name')), group.get(key) or []) for group in items]
+    groups = [('', [])]
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if item.get('type') == 'group':
+            groups.append((_text(item.get('name')), []))
+        else:
+            groups[-1][1].append(item)
+    return [group for group in groups if group[1]]
+
+
+def to_recipe(data):
+    """Map a wprm_recipe REST response (or its "recipe" object) to a schema.org-style Recipe dict."""
+    recipe = data.get('recipe', data) if isinstance(data, dict) else None
+    if not isinstance(recipe, dict):
+        return None
+
+    ingredients = []
+    for _, items in _groups(recipe.get('ingredients') or recipe.get('ingredients_flat') or [], 'ingredients'):
+        ingredients.extend(_ingredient(item) for item in items if isinstance(item, dict))
+
+    instructions = []
+    for name, items in _groups(recipe.get('instructions') or recipe.get('instructions_flat') or [], 'instructions'):
+        steps = [
+            {'@type': 'HowToStep', 'text': text}
+            for text in (_text(item.get('text')) for item in items if isinstance(item, dict)) if text
+        ]
+        if name:
+            instructions.append({'@type': 'HowToSection', 'name': name, 'itemListElement': steps})
+        else:
+            instructions.extend(steps)
+
+    return {
+        '@type': 'Recipe',
+        'name': _text(recipe.get('name')) or _text((data.get('title') or {}).get('rendered')),
+        'recipeIngredient': [ingredient for ingredient in ingredients if ingredient],
+        'recipeInstructions': instructions,
+        'url': recipe.get('parent_url') or None,
+    }
+
+
+def fetch_recipe(session, page_url, recipe_id, timeout=10):
+    """
+    Fetch and map the WPRM recipe behind `page_url`. Returns a complete
+    Recipe dict, or None when the endpoint is unavailable or the data is
+    incomplete. Outcomes are counted as the "wprm_json" adapter.
+    """
+    started = time.perf_counter()
+    outcome, recipe = 'misses', None
+    try:
+        response = session.get(api_url(page_url, recipe_id), timeout=timeout, headers={'Accept': 'application/json'})
+        response.raise_for_status()
+        if len(response.content) <= MAX_JSON_BYTES:
+            recipe = to_recipe(response.json())
+        if recipe_render.is_complete(recipe):
+            outcome = 'hits'
+        else:
+            recipe = None
+    except Exception as e:
+        print(f"WPRM recipe {recipe_id} unavailable for {page_url}: {e}")
+        outcome = 'errors'
+    site_adapters.record('wprm_json', outcome, time.perf_counter() - started)
+    return recipe
@@ -0,0 +1,271 @@
+"""
+Write-behind recipe storage.
+
+WriteBehindStorage wraps another StorageBackend. Saves and deletes are
+recorded in a durable SQLite journal and return immediately; a background
+flusher thread in each process uploads them to the wrapped backend in
+batches, retrying failures with exponential backoff. Reads check the
+journal first, so a recipe is visible as soon as it has been saved.
+
+Enable it by pointing WRITE_BEHIND_JOURNAL at a journal file. Several
+worker processes may share one journal: rows are claimed with a lease,
+and a row that was rewritten while it was being flushed is flushed again
+rather than dropped.
+"""
+
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from storage import StorageBackend
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    op TEXT NOT NULL,              -- 'put' or 'delete'
+    content TEXT,
+    recipe_name TEXT,
+    seq INTEGER NOT NULL,
+    queued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_until REAL
+)
+"""
+
+
+class WriteBehindStorage(StorageBackend):
+    def __init__(self, inner, journal_path, batch_size=50, poll_interval=1.0,
+                 retry_base=1.0, retry_max=300.0, lease=120.0):
+        self.inner = inner
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.listing_concurrency = inner.listing_concurrency
+
+        directory = os.path.dirname(os.path.abspath(journal_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_journal_due ON journal (next_attempt_at)")
+
+        self._wake = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+        self._flusher_lock = threading.Lock()
+        self._ensure_flusher()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.journal_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _ensure_flusher(self):
+        """One flusher thread per process; forked workers start their own."""
+        if self._flusher is not None and self._flusher_pid == os.getpid() and self._flusher.is_alive():
+            return
+        with self._flusher_lock:
+            if self._flusher is None or self._flusher_pid != os.getpid() or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run_flusher, name='write-behind-flusher', daemon=True)
+                self._flusher_pid = os.getpid()
+                self._flusher.start()
+
+    def _enqueue(self, op, filename, user_id, content=None, recipe_name=None):
+        key = f"recipes/{user_id}/{filename}"
+        now = time.time()
+        with self._connect() as conn:
+            # Latest write for a key replaces any pending one; a claim held by an
+            # in-flight flush is kept so that flush can't race a newer one
+            conn.execute("""
+                INSERT INTO journal (key, user_id, filename, op, content, recipe_name, seq, queued_at, next_attempt_at)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    op = excluded.op, content = excluded.content, recipe_name = excluded.recipe_name,
+                    seq = journal.seq + 1, queued_at = excluded.queued_at, attempts = 0,
+                    next_attempt_at = excluded.next_attempt_at, last_error = NULL
+            """, (key, str(user_id), filename, op, content, recipe_name, now, now))
+        self._ensure_flusher()
+        self._wake.set()
+
+    def _pending(self, key):
+        with self._connect() as conn:
+            return conn.execute("SELECT op, content, queued_at FROM journal WHERE key = ?", (key,)).fetchone()
+
+    # --- StorageBackend API -------------------------------------------------
+
+    def save_recipe(self, filename, content, recipe_name, user_id):
+        try:
+            self._enqueue('put', filename, user_id, content, recipe_name)
+            return True
+        except sqlite3.Error as e:
+            print(f"Write-behind journal failed for {filename}: {e}")
+            return False
+
+    def delete_recipe(self, filename, user_id):
+        try:
+            self._enqueue('delete', filename, user_id)
+            return True
+        except sqlite3.Error as e:
+            print(f"Write-behind journal failed for {filename}: {e}")
+            return False
+
+    def fetch_recipe(self, filename, user_id):
+        row = self._pending(f"recipes/{user_id}/{filename}")
+        if row is None:
+            return self.inner.fetch_recipe(filename, user_id)
+        if row['op'] == 'delete':
+            return None, None, None
+        etag = hashlib.md5(row['content'].encode('utf-8')).hexdigest()
+        return row['content'], f'"{etag}"', datetime.fromtimestamp(row['queued_at'], timezone.utc)
+
+    def read_recipe_object(self, key):
+        row = self._pending(key)
+        if row is None:
+            return self.inner.read_recipe_object(key)
+        if row['op'] == 'delete':
+            raise KeyError(f"{key} is pending deletion")
+        return row['content']
+
+    def list_recipes(self, user_id):
+        return self.inner.list_recipes(user_id)
+
+    def list_all_recipes_admin(self):
+        return self.inner.list_all_recipes_admin()
+
+    def iter_recipe_keys(self, prefix="recipes/"):
+        return self.inner.iter_recipe_keys(prefix)
+
+    def check_ready(self):
+        return self.inner.check_ready()
+
+    def presign_recipe_url(self, filename, user_id, expires_in):
+        if self._pending(f"recipes/{user_id}/{filename}") is not None:
+            return None  # Not in the backing store yet (or about to leave it)
+        return self.inner.presign_recipe_url(filename, user_id, expires_in)
+
+    def presign_photo_upload(self, user_id, content_type, expires_in, max_bytes, method='post'):
+        return self.inner.presign_photo_upload(user_id, content_type, expires_in, max_bytes, method)
+
+    def cache_stats(self):
+        stats = dict(self.inner.cache_stats())
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS pending,
+                       SUM(CASE WHEN attempts > 0 THEN 1 ELSE 0 END) AS retrying,
+                       MIN(queued_at) AS oldest
+                FROM journal
+            """).fetchone()
+        stats['write_behind'] = {
+            'pending': row['pending'],
+            'retrying': row['retrying'] or 0,
+            'oldest_pending_seconds': round(time.time() - row['oldest'], 1) if row['oldest'] else 0,
+        }
+        return stats
+
+    # --- Flusher ------------------------------------------------------------
+
+    def _run_flusher(self):
+        worker_id = f"{os.getpid()}-{threading.get_ident()}"
+        with ThreadPoolExecutor(max_workers=max(1, self.listing_concurrency)) as pool:
+            while True:
+                try:
+                    flushed = self.flush_once(worker_id, pool)
+                except Exception as e:
+                    print(f"Write-behind flush cycle failed: {e}")
+                    flushed = 0
+                if flushed < self.batch_size:
+                    # Nothing more due right now: sleep until woken by a new write
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+
+    def _claim_batch(self, worker_id):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("""
+                    SELECT key, user_id, filename, op, content, recipe_name, seq, attempts FROM journal
+                    WHERE next_attempt_at <= ? AND (claimed_by IS NULL OR claimed_until < ?)
+                    ORDER BY queued_at LIMIT ?
+                """, (now, now, self.batch_size)).fetchall()
+                conn.executemany(
+                    "UPDATE journal SET claimed_by = ?, claimed_until = ? WHERE key = ?",
+                    [(worker_id, now + self.lease, row['key']) for row in rows]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _complete(self, row, error=None):
+        with self._connect() as conn:
+            if error is None:
+                # Only drop the row if nobody rewrote the key while it was in flight
+                conn.execute("DELETE FROM journal WHERE key = ? AND seq = ?", (row['key'], row['seq']))
+                conn.execute("UPDATE journal SET claimed_by = NULL, claimed_until = NULL WHERE key = ?", (row['key'],))
+            else:
+                delay = min(self.retry_max, self.retry_base * (2 ** row['attempts']))
+                delay *= random.uniform(0.5, 1.0)  # Jitter so workers don't retry in lockstep
+                conn.execute("""
+                    UPDATE journal SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?,
+                                       claimed_by = NULL, claimed_until = NULL
+                    WHERE key = ? AND seq = ?
+                """, (time.time() + delay, str(error)[:500], row['key'], row['seq']))
+                conn.execute("UPDATE journal SET claimed_by = NULL, claimed_until = NULL WHERE key = ?", (row['key'],))
+
+    def flush_once(self, worker_id='manual', pool=None):
+        """Flush one batch of due journal entries. Returns how many entries were attempted."""
+        rows = self._claim_batch(worker_id)
+        if not rows:
+            return 0
+
+        puts = [row for row in rows if row['op'] == 'put']
+        deletes = {}
+        for row in rows:
+            if row['op'] == 'delete':
+                deletes.setdefault(row['user_id'], []).append(row)
+
+        def upload(row):
+            try:
+                ok = self.inner.save_recipe(row['filename'], row['content'], row['recipe_name'], row['user_id'])
+                return None if ok else 'Backing store rejected the write'
+            except Exception as e:
+                return str(e)
+
+        if pool is None:
+            errors = [upload(row) for row in puts]
+        else:
+            errors = list(pool.map(upload, puts))
+        for row, error in zip(puts, errors):
+            self._complete(row, error)
+
+        # Deletes for one user go out as a single bulk call
+        for user_id, user_rows in deletes.items():
+            try:
+                results = self.inner.delete_recipes([row['filename'] for row in user_rows], user_id)
+            except Exception as e:
+                results = {row['filename']: str(e) for row in user_rows}
+            for row in user_rows:
+                self._complete(row, results.get(row['filename'], 'No result from backing store'))
+
+        return len(rows)